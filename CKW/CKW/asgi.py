@@ -2,6 +2,8 @@
 ASGI config for CKW project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve the site through it (e.g. ``uvicorn CKW.asgi:application``) to enable
+live order-status updates on the track page.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
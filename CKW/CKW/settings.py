@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,6 +47,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'cloud_kitchen.middleware.SessionUserMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -72,15 +74,124 @@ WSGI_APPLICATION = 'CKW.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# CKW_DB_ENGINE picks the profile: 'sqlite' (default) or 'postgres'.
+
+if os.environ.get('CKW_DB_ENGINE', 'sqlite') == 'postgres':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('CKW_DB_NAME', 'ckw'),
+            'USER': os.environ.get('CKW_DB_USER', 'ckw'),
+            'PASSWORD': os.environ.get('CKW_DB_PASSWORD', ''),
+            'HOST': os.environ.get('CKW_DB_HOST', 'localhost'),
+            'PORT': os.environ.get('CKW_DB_PORT', '5432'),
+        }
+    }
+    if os.environ.get('CKW_DB_POOL'):
+        # psycopg connection pool (needs psycopg[pool]); Django does not allow
+        # it together with persistent connections
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {
+                'min_size': 2,
+                'max_size': int(os.environ.get('CKW_DB_POOL_SIZE', 10)),
+            },
+        }
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('CKW_DB_CONN_MAX_AGE', 600))
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+        }
+    }
+    if os.environ.get('CKW_SQLITE_TUNING', '1') != '0':
+        DATABASES['default']['OPTIONS'] = {
+            # WAL lets readers carry on while an order is being written, and
+            # IMMEDIATE transactions take the write lock up front instead of
+            # failing with "database is locked" when a reader tries to upgrade
+            'init_command': (
+                'PRAGMA journal_mode=WAL;'
+                'PRAGMA synchronous=NORMAL;'
+                'PRAGMA busy_timeout=20000;'
+                'PRAGMA mmap_size=134217728;'
+            ),
+            'transaction_mode': 'IMMEDIATE',
+        }
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# Catalog versions, menu snapshots and the review feed version live here, so
+# every worker process must see the same cache. Set CKW_REDIS_URL to use
+# Redis; otherwise a table in the database is used (create it once with
+# `python manage.py createcachetable`).
+
+if os.environ.get('CKW_REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['CKW_REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'ckw_cache',
+            'OPTIONS': {
+                'MAX_ENTRIES': 5000,
+            },
+        }
     }
+
+# Rendered template fragments ({% cache %} blocks) stay in process memory, so
+# a deploy with changed templates never picks up stale markup from a shared
+# cache. Catalog-dependent fragments are keyed by the catalog version.
+CACHES['template_fragments'] = {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'ckw-template-fragments',
 }
 
 
+# Sessions
+# https://docs.djangoproject.com/en/5.2/topics/http/sessions/
+# With Redis, sessions are cache-backed with write-behind persistence (see
+# cloud_kitchen/session_backend.py). Without it they are read from and written
+# to the database directly, which every worker sees the same way.
+
+if os.environ.get('CKW_REDIS_URL'):
+    SESSION_ENGINE = 'cloud_kitchen.session_backend'
+    SESSION_WRITE_BEHIND_INTERVAL = 60
+else:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+    SESSION_WRITE_BEHIND_INTERVAL = 0
+
+# Seconds a worker may reuse a User row loaded by SessionUserMiddleware.
+# 0 disables the per-process cache; every request then loads the user once.
+SESSION_USER_CACHE_TTL = 0
+
+
+# Live order tracking
+# Broker that fans order-status changes out to open track pages (see
+# cloud_kitchen/events.py). The local broker only reaches clients connected
+# to the same process.
+
+ORDER_EVENTS_BROKER = 'cloud_kitchen.events.LocalBroker'
+
+
+# Kitchen queue
+# Minutes from checkout to food ready, and how often (seconds) each process
+# reloads open orders placed or changed elsewhere (see cloud_kitchen/kitchen.py).
+# KITCHEN_CAPACITY is how many orders the kitchen cooks at once; delivery
+# estimates stretch the waiting time when more are open (cloud_kitchen/eta.py).
+
+KITCHEN_SLA_MINUTES = 30
+KITCHEN_QUEUE_RESYNC = 30
+KITCHEN_CAPACITY = 8
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -1,12 +1,29 @@
+from django import forms
 from django.contrib import admin
 from django.urls import reverse, path
 from django.utils.html import format_html
 from django.http import HttpResponseRedirect
+from django.core.exceptions import PermissionDenied
+from django.template.response import TemplateResponse
 from django.contrib import messages
-from .models import User, Category, FoodItem, Cart, CartItem, Order, Offer, ContactMessage, Review
+from django.db.models import Sum
+from .models import User, Category, FoodItem, Cart, CartItem, Order, OrderLine, OrderStatusEvent, Offer, ContactMessage, Review, SalesRollup
+from .order_status import InvalidTransition, bulk_transition, transition_order
+from .sales import get_dashboard
+from .exports import export_response
 
 # Custom Admin Classes
 
+def export_actions(name):
+    """Admin actions streaming the selected rows of the ``name`` export."""
+    def make_action(fmt, compress):
+        def action(modeladmin, request, queryset):
+            return export_response(request, name, queryset, fmt, compress)
+        action.__name__ = f"export_{fmt}{'_gzip' if compress else ''}"
+        action.short_description = f"Export selected as {fmt.upper()}{' (gzip)' if compress else ''}"
+        return action
+    return [make_action('csv', False), make_action('csv', True), make_action('jsonl', True)]
+
 class CartItemInline(admin.TabularInline):
     model = CartItem
     extra = 0
@@ -22,7 +39,8 @@ class CartAdmin(admin.ModelAdmin):
     list_filter = ('created_at',)
     search_fields = ('user__username', 'session_key')
     inlines = [CartItemInline]
-    readonly_fields = ('created_at', 'updated_at')
+    readonly_fields = ('item_count', 'subtotal', 'created_at', 'updated_at')
+    actions = ['resync_summaries']
 
     def get_user(self, obj):
         if obj.user:
@@ -30,13 +48,28 @@ class CartAdmin(admin.ModelAdmin):
         return f"Anonymous ({obj.session_key[:8]}...)"
     get_user.short_description = "User"
 
+    def get_queryset(self, request):
+        # Totals for every row come from one grouped query instead of per-cart lookups
+        return super().get_queryset(request).select_related('user').annotate(
+            counted_items=Sum('cartitem__quantity'),
+            counted_subtotal=Sum(CartItem.line_total_expression('cartitem__')),
+        )
+
     def get_total_items(self, obj):
-        return obj.get_total_items()
+        return obj.counted_items or 0
     get_total_items.short_description = "Items Count"
+    get_total_items.admin_order_field = 'counted_items'
 
     def get_subtotal(self, obj):
-        return f"₹{obj.get_subtotal()}"
+        return f"₹{obj.counted_subtotal or 0}"
     get_subtotal.short_description = "Subtotal"
+    get_subtotal.admin_order_field = 'counted_subtotal'
+
+    def resync_summaries(self, request, queryset):
+        for cart in queryset:
+            cart.refresh_summary()
+        self.message_user(request, f'{queryset.count()} cart summary(ies) recalculated.')
+    resync_summaries.short_description = "Recalculate stored cart summaries"
 
 class UserAdmin(admin.ModelAdmin):
     list_display = ('username', 'email', 'is_staff', 'cart_link')
@@ -47,32 +80,128 @@ class UserAdmin(admin.ModelAdmin):
         try:
             cart = Cart.objects.get(user=obj)
             url = reverse('admin:cloud_kitchen_cart_change', args=[cart.id])
-            return format_html('<a href="{}">View Cart ({})</a>', url, cart.get_total_items())
+            return format_html('<a href="{}">View Cart ({})</a>', url, cart.item_count)
         except Cart.DoesNotExist:
             return "No Cart"
     cart_link.short_description = "Cart"
 
+class OrderLineInline(admin.TabularInline):
+    model = OrderLine
+    extra = 0
+    fields = ('name', 'food_item', 'quantity', 'unit_price', 'is_offer_item', 'line_total')
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+class OrderStatusEventInline(admin.TabularInline):
+    model = OrderStatusEvent
+    extra = 0
+    fields = ('created_at', 'from_status', 'to_status', 'source')
+    readonly_fields = fields
+    can_delete = False
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+class OrderAdminForm(forms.ModelForm):
+    class Meta:
+        model = Order
+        fields = '__all__'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Edits are told apart by the status the page showed, not a fresh read,
+        # so rows of the changelist nobody touched are left alone
+        self.fields['status'].show_hidden_initial = True
+
+    def clean_status(self):
+        status = self.cleaned_data['status']
+        self.current_status = None
+        if 'status' not in self.changed_data or not self.instance.pk:
+            return status
+        # Checked against the stored status, which may have moved since the page loaded
+        self.current_status = Order.objects.filter(pk=self.instance.pk).values_list('status', flat=True).first()
+        if self.current_status and status != self.current_status and status not in Order.allowed_transitions(self.current_status):
+            raise forms.ValidationError(
+                f"{dict(Order.STATUS_CHOICES)[self.current_status]} orders cannot be moved to "
+                f"{dict(Order.STATUS_CHOICES)[status]}."
+            )
+        return status
+
 class OrderAdmin(admin.ModelAdmin):
+    form = OrderAdminForm
     list_display = ('order_number', 'user', 'total', 'status', 'created_at', 'mark_delivered_action')
     list_filter = ('status', 'created_at')
     search_fields = ('order_number', 'user__username')
     list_editable = ('status',)
-    actions = ['mark_orders_delivered']
+    actions = ['mark_orders_confirmed', 'mark_orders_preparing', 'mark_orders_ready',
+               'mark_orders_delivered', 'mark_orders_cancelled', *export_actions('orders')]
+    inlines = [OrderLineInline, OrderStatusEventInline]
 
     def mark_delivered_action(self, obj):
-        if obj.status != 'delivered':
+        if obj.can_transition_to('delivered'):
             return format_html(
                 '<a class="button" href="{}" style="background: #417690; color: white; padding: 5px 10px; text-decoration: none; border-radius: 3px;">Mark Delivered</a>',
                 reverse('admin:mark_order_delivered', args=[obj.pk])
             )
+        if obj.status == 'cancelled':
+            return "❌ Cancelled"
         return "✅ Delivered"
     mark_delivered_action.short_description = "Action"
 
+    def get_changelist_form(self, request, **kwargs):
+        # list_editable status edits are validated like the change form
+        kwargs.setdefault('form', OrderAdminForm)
+        return super().get_changelist_form(request, **kwargs)
+
+    def save_model(self, request, obj, form, change):
+        # Status changes go through the state machine so they are logged. The
+        # admin saves inside a transaction, so a transition that still fails
+        # here (a concurrent change after validation) rolls the edit back.
+        # Other edits are saved on their own, never writing back a status
+        # that may have moved since the page loaded.
+        if not change:
+            obj.save()
+            return
+        fields = [name for name in form.changed_data if name != 'status']
+        status_changed = 'status' in form.changed_data and obj.status != form.current_status
+        new_status = obj.status
+        obj.status = form.current_status or obj.status
+        if fields:
+            obj.save(update_fields=fields + ['updated_at'])
+        if status_changed:
+            transition_order(obj, new_status, source='admin')
+
+    def transition_selected(self, request, queryset, status):
+        changed = bulk_transition(queryset, status, source='admin')
+        skipped = queryset.count() - len(changed)
+        label = dict(Order.STATUS_CHOICES)[status].lower()
+        self.message_user(request, f'{len(changed)} order(s) marked as {label}.')
+        if skipped:
+            self.message_user(request, f'{skipped} order(s) skipped; they cannot move to {label} from their current status.', level='warning')
+
+    def mark_orders_confirmed(self, request, queryset):
+        self.transition_selected(request, queryset, 'confirmed')
+    mark_orders_confirmed.short_description = "Mark selected orders as confirmed"
+
+    def mark_orders_preparing(self, request, queryset):
+        self.transition_selected(request, queryset, 'preparing')
+    mark_orders_preparing.short_description = "Mark selected orders as preparing"
+
+    def mark_orders_ready(self, request, queryset):
+        self.transition_selected(request, queryset, 'ready')
+    mark_orders_ready.short_description = "Mark selected orders as ready"
+
     def mark_orders_delivered(self, request, queryset):
-        updated = queryset.update(status='delivered')
-        self.message_user(request, f'{updated} order(s) marked as delivered.')
+        self.transition_selected(request, queryset, 'delivered')
     mark_orders_delivered.short_description = "Mark selected orders as delivered"
 
+    def mark_orders_cancelled(self, request, queryset):
+        self.transition_selected(request, queryset, 'cancelled')
+    mark_orders_cancelled.short_description = "Cancel selected orders"
+
     def get_urls(self):
         urls = super().get_urls()
         custom_urls = [
@@ -83,14 +212,58 @@ class OrderAdmin(admin.ModelAdmin):
     def mark_delivered_view(self, request, order_id):
         try:
             order = Order.objects.get(pk=order_id)
-            order.status = 'delivered'
-            order.save()
+            transition_order(order, 'delivered', source='admin')
             self.message_user(request, f'Order {order.order_number} marked as delivered.')
         except Order.DoesNotExist:
             self.message_user(request, 'Order not found.', level='error')
+        except InvalidTransition as e:
+            self.message_user(request, str(e), level='error')
 
         return HttpResponseRedirect(reverse('admin:cloud_kitchen_order_changelist'))
 
+class OfferAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'is_active', 'starts_at', 'ends_at', 'daily_start', 'daily_end', 'weekdays', 'is_live_now')
+    list_filter = ('is_active',)
+    search_fields = ('food_item__name',)
+    list_select_related = ('food_item',)
+
+    def is_live_now(self, obj):
+        return obj.is_live()
+    is_live_now.boolean = True
+    is_live_now.short_description = "Live now"
+
+class SalesRollupAdmin(admin.ModelAdmin):
+    """The sales dashboard, drawn from the rollup rows instead of a changelist."""
+    DASHBOARD_DAYS = (7, 30, 90)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        try:
+            days = int(request.GET.get('days', 30))
+        except ValueError:
+            days = 30
+        if days not in self.DASHBOARD_DAYS:
+            days = 30
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Sales dashboard',
+            'opts': self.model._meta,
+            'day_choices': self.DASHBOARD_DAYS,
+            **get_dashboard(days),
+            **(extra_context or {}),
+        }
+        return TemplateResponse(request, 'admin/sales_dashboard.html', context)
+
 # Register your models here.
 
 class ReviewAdmin(admin.ModelAdmin):
@@ -98,17 +271,26 @@ class ReviewAdmin(admin.ModelAdmin):
     list_filter = ('stars', 'created_at')
     search_fields = ('user__username', 'message')
     readonly_fields = ('created_at',)
+    actions = export_actions('reviews')
 
     def message_preview(self, obj):
         return obj.message[:50] + '...' if len(obj.message) > 50 else obj.message
     message_preview.short_description = "Message Preview"
 
+class ContactMessageAdmin(admin.ModelAdmin):
+    list_display = ('name', 'email', 'subject', 'is_read', 'created_at')
+    list_filter = ('is_read', 'created_at')
+    search_fields = ('name', 'email', 'subject', 'message')
+    readonly_fields = ('created_at',)
+    actions = export_actions('contact_messages')
+
 admin.site.register(User, UserAdmin)
 admin.site.register(Category)
 admin.site.register(FoodItem)
 admin.site.register(Cart, CartAdmin)
 admin.site.register(CartItem)
-admin.site.register(Offer)
-admin.site.register(ContactMessage)
+admin.site.register(Offer, OfferAdmin)
+admin.site.register(ContactMessage, ContactMessageAdmin)
 admin.site.register(Order, OrderAdmin)
 admin.site.register(Review, ReviewAdmin)
+admin.site.register(SalesRollup, SalesRollupAdmin)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CloudKitchenConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cloud_kitchen'
+
+    def ready(self):
+        from . import signals  # noqa: F401
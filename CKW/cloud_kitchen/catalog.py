@@ -0,0 +1,250 @@
+"""
+Versioned snapshots of menu data.
+
+Snapshots are plain Python structures kept in the shared Django cache (Redis
+or the database cache table, never a per-process cache) and mirrored in a
+per-process dict. Both are keyed by a catalog version number
+that catalog signals bump, so a steady-state menu request only reads the
+version key and never touches the database.
+
+Scheduled offers start and stop without any row changing, so building the
+offer index also records when the next offer boundary falls; the first
+request after that moment moves the catalog to a new version.
+"""
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils import timezone
+from .models import Category, FoodItem, Offer
+
+CATALOG_VERSION_KEY = 'catalog:version'
+# (catalog version, unix time) of the next scheduled offer start or end
+OFFER_BOUNDARY_KEY = 'catalog:offer-boundary'
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+# name -> (catalog version, snapshot) for snapshots this process has loaded
+_local_snapshots = {}
+
+
+def get_catalog_version():
+    values = cache.get_many([CATALOG_VERSION_KEY, OFFER_BOUNDARY_KEY])
+    version = values.get(CATALOG_VERSION_KEY)
+    if version is None:
+        # Seed with a timestamp so a lost cache never revives an old version
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(CATALOG_VERSION_KEY)
+
+    boundary = values.get(OFFER_BOUNDARY_KEY)
+    if boundary is not None and boundary[0] == version and time.time() >= boundary[1]:
+        # A scheduled offer just started or ended; only one request bumps
+        if cache.add(f'catalog:{version}:expired', True, SNAPSHOT_TIMEOUT):
+            bump_catalog_version()
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    # A fresh timestamp rather than incr(), which the database cache does not
+    # do atomically; two concurrent bumps still end on a new version
+    cache.set(CATALOG_VERSION_KEY, time.time_ns(), None)
+    _local_snapshots.clear()
+
+
+def get_snapshot(name, build):
+    """Return snapshot ``name`` for the current catalog version, calling ``build`` on a miss."""
+    version = get_catalog_version()
+    local = _local_snapshots.get(name)
+    if local is not None and local[0] == version:
+        return local[1]
+
+    key = f'catalog:{version}:{name}'
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build()
+        cache.set(key, snapshot, SNAPSHOT_TIMEOUT)
+    _local_snapshots[name] = (version, snapshot)
+    return snapshot
+
+
+def get_category_menu(slug):
+    """Available food items of one category, as dicts ready for the category templates."""
+    return get_snapshot(f'category:{slug}', lambda: _build_category_menu(slug))
+
+
+def _build_category_menu(slug):
+    food_items = FoodItem.objects.filter(category__slug=slug, is_available=True)
+    offer_index = get_offer_index()
+    food_items = list(food_items.values('id', 'name', 'description', 'price', 'icon_class'))
+    for item in food_items:
+        offer = offer_index.get(item['id'])
+        item['offer_price'] = offer['discounted_price'] if offer else None
+        item['discount_percentage'] = offer['discount_percentage'] if offer else None
+    return {
+        'food_items': food_items,
+    }
+
+
+def get_offer_index():
+    """Map of food_item_id -> best active offer for that item, with its discounted price.
+
+    When several offers are active for one item the biggest discount wins
+    (the newest one on a tie). The offers page, category pages and cart
+    pricing all read offers from here instead of querying Offer.
+    """
+    return get_snapshot('offer_index', _build_offer_index)
+
+
+def get_active_offers():
+    """Active offers with their food item details and discounted price, for the offers page."""
+    return get_snapshot('offers', _build_active_offers)
+
+
+def _build_offer_index():
+    now = timezone.now()
+    offers = Offer.objects.filter(
+        Q(ends_at__isnull=True) | Q(ends_at__gt=now), is_active=True
+    ).select_related('food_item__category')
+
+    offer_index = {}
+    next_boundary = None
+    # Newest first (the model ordering), so on equal discounts the newest offer is kept
+    for offer in offers:
+        change = offer.next_change(now)
+        if change is not None and (next_boundary is None or change < next_boundary):
+            next_boundary = change
+        if not offer.is_live(now):
+            continue
+        current = offer_index.get(offer.food_item_id)
+        if current is not None and current['discount_percentage'] >= offer.discount_percentage:
+            continue
+        offer_index[offer.food_item_id] = {
+            'id': offer.id,
+            'food_item_id': offer.food_item.id,
+            'category': offer.food_item.category.slug,
+            'name': offer.food_item.name,
+            'description': offer.food_item.description,
+            'original_price': offer.food_item.price,
+            'discounted_price': offer.get_discounted_price(),
+            'discount_percentage': offer.discount_percentage,
+            'icon_class': offer.food_item.icon_class,
+            'is_available': offer.food_item.is_available,
+            'created_at': offer.created_at,
+        }
+
+    if next_boundary is not None:
+        cache.set(OFFER_BOUNDARY_KEY, (get_catalog_version(), next_boundary.timestamp()), None)
+    return offer_index
+
+
+def _build_active_offers():
+    return sorted(get_offer_index().values(), key=lambda offer: offer['created_at'], reverse=True)
+
+
+# Read-only catalog API (views.catalog_api_view)
+
+API_FIELDS = {
+    'categories': ('id', 'name', 'display_name', 'emoji', 'slug'),
+    'items': ('id', 'name', 'description', 'price', 'icon_class', 'category', 'offer_price', 'discount_percentage'),
+    'offers': ('id', 'food_item_id', 'category', 'name', 'description', 'original_price', 'discounted_price',
+               'discount_percentage', 'icon_class', 'is_available'),
+}
+API_PAGE_SIZE = 50
+API_MAX_PAGE_SIZE = 200
+
+
+def parse_api_query(resource, params):
+    """Validate the query string of a catalog API request.
+
+    Returns the normalized ``fields``, ``category``, ``cursor`` and ``limit``;
+    raises ValueError with a message for the client on bad input.
+    """
+    allowed = API_FIELDS[resource]
+    fields = allowed
+    if params.get('fields'):
+        requested = set(params['fields'].split(','))
+        unknown = requested.difference(allowed)
+        if unknown:
+            raise ValueError(f"Unknown field(s): {', '.join(sorted(unknown))}")
+        fields = tuple(field for field in allowed if field in requested)
+
+    category = params.get('category') or None
+    if category and resource == 'categories':
+        raise ValueError("The category filter does not apply to categories")
+
+    try:
+        cursor = int(params.get('cursor') or 0)
+        limit = int(params.get('limit') or API_PAGE_SIZE)
+    except ValueError:
+        raise ValueError("cursor and limit must be integers")
+    if cursor < 0:
+        raise ValueError("cursor must be >= 0")
+    if not 1 <= limit <= API_MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {API_MAX_PAGE_SIZE}")
+
+    return {'fields': fields, 'category': category, 'cursor': cursor, 'limit': limit}
+
+
+def get_api_page_key(resource, query):
+    """Identifies one page of one resource; stable for the same normalized query."""
+    raw = f"{resource}|{','.join(query['fields'])}|{query['category'] or ''}|{query['cursor']}|{query['limit']}"
+    return hashlib.md5(raw.encode()).hexdigest()
+
+
+def render_api_page(resource, query):
+    """JSON body for one page of a catalog API resource.
+
+    Pages are serialized once per catalog version and kept in the cache,
+    so repeated fetches return stored bytes without touching the database
+    or the serializer.
+    """
+    version = get_catalog_version()
+    key = f'catalog:{version}:api:{get_api_page_key(resource, query)}'
+    body = cache.get(key)
+    if body is None:
+        records = get_snapshot(f'api:{resource}', API_BUILDERS[resource])
+        if query['category']:
+            records = [record for record in records if record['category'] == query['category']]
+        records = [record for record in records if record['id'] > query['cursor']]
+        page = records[:query['limit']]
+        next_cursor = page[-1]['id'] if len(records) > query['limit'] else None
+        body = json.dumps({
+            'success': True,
+            'version': version,
+            'results': [{field: record[field] for field in query['fields']} for record in page],
+            'next_cursor': next_cursor,
+        }, cls=DjangoJSONEncoder).encode()
+        cache.set(key, body, SNAPSHOT_TIMEOUT)
+    return body
+
+
+def _build_api_categories():
+    categories = Category.objects.filter(is_active=True).order_by('id')
+    return list(categories.values('id', 'name', 'display_name', 'emoji', 'slug'))
+
+
+def _build_api_items():
+    offer_index = get_offer_index()
+    items = []
+    food_items = FoodItem.objects.filter(is_available=True, category__is_active=True).order_by('id')
+    for item in food_items.values('id', 'name', 'description', 'price', 'icon_class', 'category__slug'):
+        offer = offer_index.get(item['id'])
+        item['category'] = item.pop('category__slug')
+        item['offer_price'] = offer['discounted_price'] if offer else None
+        item['discount_percentage'] = offer['discount_percentage'] if offer else None
+        items.append(item)
+    return items
+
+
+def _build_api_offers():
+    return sorted(get_offer_index().values(), key=lambda offer: offer['id'])
+
+
+API_BUILDERS = {
+    'categories': _build_api_categories,
+    'items': _build_api_items,
+    'offers': _build_api_offers,
+}
@@ -0,0 +1,73 @@
+"""
+Order placement from a cart.
+"""
+from django.db import IntegrityError, transaction
+from .models import Order, OrderLine
+from .sales import add_order_sales
+
+
+def place_order(user, cart, client_token=None):
+    """Turn ``cart`` into an Order for ``user`` and clear the cart.
+
+    The cart is read once, with its food items, and totals are computed once
+    from that snapshot; the order insert, the sales rollups and the cart
+    clearing then share one short transaction. Passing the same
+    ``client_token`` again returns the order it already produced, so a
+    retried payment cannot create a duplicate.
+
+    Returns ``(order, created)``, or ``(None, False)`` when the cart is empty.
+    """
+    client_token = client_token or None
+    if client_token:
+        existing = Order.objects.filter(user=user, client_token=client_token).first()
+        if existing:
+            return existing, False
+
+    items = list(cart.cartitem_set.select_related('food_item'))
+    if not items:
+        return None, False
+
+    order_items = []
+    for item in items:
+        order_items.append({
+            'food_item_id': item.food_item.id,
+            'name': item.food_item.name,
+            'description': item.food_item.description,
+            'price': float(item.food_item.price),
+            'quantity': item.quantity,
+            'total_price': float(item.get_total_price()),
+            'is_offer_item': item.is_offer_item,
+            'offer_price': float(item.offer_price) if item.offer_price else None
+        })
+    totals = cart.get_totals(items)
+    # Allocated outside the order transaction so the counter row is not held
+    # while the order is written
+    order_number = Order.generate_order_number()
+
+    try:
+        with transaction.atomic():
+            order = Order.objects.create(
+                user=user,
+                order_number=order_number,
+                client_token=client_token,
+                items=order_items,  # Store as JSON
+                subtotal=totals['subtotal'],
+                delivery_fee=totals['delivery_fee'],
+                tax=totals['tax'],
+                total=totals['total'],
+                status='pending'
+            )
+            OrderLine.objects.bulk_create(OrderLine.build_for_order(order))
+            add_order_sales([order])
+            # Only the lines that went into the order are removed; anything
+            # added meanwhile stays in the cart
+            cart.cartitem_set.filter(pk__in=[item.pk for item in items]).delete()
+            cart.refresh_summary()
+    except IntegrityError:
+        if client_token:
+            # A concurrent retry with the same token placed the order first
+            existing = Order.objects.filter(user=user, client_token=client_token).first()
+            if existing:
+                return existing, False
+        raise
+    return order, True
@@ -0,0 +1,236 @@
+"""
+Delivery estimates for the track page.
+
+Every status change records how long the order spent in the status it
+left, once for each item category in the order, in a StageTiming row.
+Each row keeps P² estimators (Jain & Chlamtac) of the median and the 90th
+percentile: five markers per quantile, updated in constant time and space,
+so estimates follow the kitchen's pace without reading past orders.
+
+An order's estimate adds up, for its current and every later stage, the
+time its slowest category usually takes there. The waiting stages
+(pending, confirmed) are stretched when the kitchen queue holds more open
+orders than the kitchen can cook at once (KITCHEN_CAPACITY).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from .kitchen import DEFAULT_PREP_MINUTES, PREP_MINUTES, get_kitchen_queue, percentile
+from .models import Order, OrderLine, OrderStatusEvent, StageTiming
+
+QUANTILES = (0.5, 0.9)
+TIMED_STAGES = ('pending', 'confirmed', 'preparing', 'ready')
+WAITING_STAGES = ('pending', 'confirmed')
+# Minutes assumed for a stage until a category has MIN_SAMPLES timings for it;
+# preparing falls back to the kitchen's PREP_MINUTES
+DEFAULT_STAGE_MINUTES = {'pending': 3, 'confirmed': 5, 'ready': 20}
+MIN_SAMPLES = 5
+STAGE_TIMINGS_KEY = 'stage-timings'
+
+
+class P2Quantile:
+    """Streaming estimate of one quantile with the P² algorithm."""
+
+    def __init__(self, p, state=None):
+        state = state or {}
+        self.p = p
+        self.count = state.get('count', 0)
+        self.heights = state.get('heights', [])
+        self.positions = state.get('positions', [1, 2, 3, 4, 5])
+        self.desired = state.get('desired', [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5])
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def state(self):
+        return {'count': self.count, 'heights': self.heights, 'positions': self.positions, 'desired': self.desired}
+
+    def add(self, x):
+        self.count += 1
+        if self.count <= 5:
+            self.heights.append(x)
+            self.heights.sort()
+            return
+
+        q, n = self.heights, self.positions
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = next(i for i in range(4) if q[i] <= x < q[i + 1])
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Move the middle markers towards their desired positions
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = self._parabolic(i, d)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    def _parabolic(self, i, d):
+        q, n = self.heights, self.positions
+        return q[i] + d / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def value(self):
+        if self.count > 5:
+            return self.heights[2]
+        return percentile(self.heights, self.p)
+
+
+def load_sketch(sketch):
+    return {p: P2Quantile(p, sketch.get(str(p))) for p in QUANTILES}
+
+
+def dump_sketch(estimators):
+    return {str(p): estimator.state() for p, estimator in estimators.items()}
+
+
+def order_categories(order, categories):
+    return {categories.get(item.get('food_item_id')) for item in order.items} - {None}
+
+
+def stage_samples(order, from_status, to_status, entered_at, left_at, categories):
+    """(category slug, stage, seconds) samples for ``order`` leaving ``from_status``.
+
+    Only moves to the next stage count; a skipped stage or a cancellation
+    says nothing about how long the stage takes.
+    """
+    if from_status not in TIMED_STAGES:
+        return []
+    if to_status != Order.STATUS_FLOW[Order.STATUS_FLOW.index(from_status) + 1]:
+        return []
+    seconds = (left_at - entered_at).total_seconds()
+    return [(slug, from_status, seconds) for slug in order_categories(order, categories)]
+
+
+def record_stage_times(samples):
+    """Fold (category slug, stage, seconds) samples into the stored estimators.
+
+    Call inside the transaction that changes the orders; the rows stay
+    locked until it commits so concurrent changes apply one after another.
+    """
+    grouped = {}
+    for slug, stage, seconds in samples:
+        grouped.setdefault((slug, stage), []).append(seconds)
+    if not grouped:
+        return
+
+    def locked_rows(keys):
+        rows = StageTiming.objects.select_for_update().filter(
+            category_slug__in={slug for slug, _ in keys}, stage__in={stage for _, stage in keys}
+        )
+        return {(row.category_slug, row.stage): row for row in rows if (row.category_slug, row.stage) in keys}
+
+    rows = locked_rows(grouped.keys())
+    missing = grouped.keys() - rows.keys()
+    if missing:
+        StageTiming.objects.bulk_create(
+            [StageTiming(category_slug=slug, stage=stage) for slug, stage in missing],
+            ignore_conflicts=True,
+        )
+        rows.update(locked_rows(missing))
+
+    for key, row in rows.items():
+        estimators = load_sketch(row.sketch)
+        for seconds in grouped[key]:
+            for estimator in estimators.values():
+                estimator.add(seconds)
+        row.sketch = dump_sketch(estimators)
+        row.sample_count += len(grouped[key])
+        row.save(update_fields=['sketch', 'sample_count', 'updated_at'])
+    transaction.on_commit(lambda: cache.delete(STAGE_TIMINGS_KEY))
+
+
+def get_stage_timings():
+    """{(category slug, stage): (median, p90) minutes} for rows with enough samples."""
+    timings = cache.get(STAGE_TIMINGS_KEY)
+    if timings is None:
+        timings = {}
+        for row in StageTiming.objects.filter(sample_count__gte=MIN_SAMPLES):
+            estimators = load_sketch(row.sketch)
+            timings[(row.category_slug, row.stage)] = tuple(estimators[p].value() / 60 for p in QUANTILES)
+        cache.set(STAGE_TIMINGS_KEY, timings, 300)
+    return timings
+
+
+def stage_minutes(slugs, stage, timings):
+    """(median, p90) minutes the slowest of ``slugs`` spends in ``stage``."""
+    medians, highs = [], []
+    for slug in slugs or [None]:
+        timing = timings.get((slug, stage))
+        if timing is None:
+            if stage == 'preparing':
+                default = PREP_MINUTES.get(slug, DEFAULT_PREP_MINUTES)
+            else:
+                default = DEFAULT_STAGE_MINUTES[stage]
+            timing = (default, default)
+        medians.append(timing[0])
+        highs.append(max(timing))
+    return max(medians), max(highs)
+
+
+def get_load_factor():
+    capacity = getattr(settings, 'KITCHEN_CAPACITY', 8)
+    return max(1, len(get_kitchen_queue()) / capacity)
+
+
+def attach_etas(orders, now=None):
+    """Set ``order.eta`` to the earliest and latest expected delivery time.
+
+    Orders that are delivered or cancelled get ``None``. The categories of
+    the open ones are read from their order lines, so ``items`` can stay
+    deferred.
+    """
+    now = now or timezone.now()
+    open_orders = []
+    for order in orders:
+        order.eta = None
+        if order.status in TIMED_STAGES:
+            open_orders.append(order)
+    if not open_orders:
+        return orders
+
+    open_ids = [order.id for order in open_orders]
+    entered = dict(
+        OrderStatusEvent.objects.filter(order_id__in=open_ids)
+        .order_by().values_list('order_id').annotate(last=Max('created_at'))
+    )
+    slugs_by_order = {}
+    lines = OrderLine.objects.filter(order_id__in=open_ids, food_item__isnull=False)
+    for order_id, slug in lines.values_list('order_id', 'food_item__category__slug'):
+        slugs_by_order.setdefault(order_id, set()).add(slug)
+    timings = get_stage_timings()
+    load = get_load_factor()
+
+    for order in open_orders:
+        slugs = slugs_by_order.get(order.id, set())
+        elapsed = (now - entered.get(order.id, order.created_at)).total_seconds() / 60
+        low = high = 0
+        for stage in TIMED_STAGES[TIMED_STAGES.index(order.status):]:
+            median, p90 = stage_minutes(slugs, stage, timings)
+            if stage in WAITING_STAGES:
+                median, p90 = median * load, p90 * load
+            if stage == order.status:
+                median, p90 = max(median - elapsed, 0), max(p90 - elapsed, 0)
+            low += median
+            high += p90
+        order.eta = {
+            'earliest': now + timedelta(minutes=low),
+            'latest': now + timedelta(minutes=max(high, low)),
+        }
+    return orders
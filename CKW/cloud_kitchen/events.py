@@ -0,0 +1,131 @@
+"""
+Live order-status updates for the track page.
+
+Status changes are published to a per-user channel and streamed to the
+browser as Server-Sent Events by ``views.order_events_view``. The stream is
+an async view, so under an ASGI server (``uvicorn CKW.asgi:application``)
+each idle tracker costs a coroutine rather than a worker thread.
+
+The default LocalBroker only reaches subscribers in the same process. Point
+ORDER_EVENTS_BROKER at another class with the same ``publish()`` /
+``subscribe()`` interface (e.g. one backed by Redis pub/sub) when running
+several processes.
+"""
+import asyncio
+import json
+import threading
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.utils.module_loading import import_string
+from .eta import attach_etas
+
+HEARTBEAT_INTERVAL = 20  # seconds between keep-alive comments on an idle stream
+
+_broker = None
+
+
+class Subscription:
+    """Messages for one channel, queued for a single listening coroutine."""
+
+    def __init__(self, broker, channel, maxsize=100):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.broker.unsubscribe(self)
+
+    async def get(self, timeout=None):
+        """Wait for the next message; raises asyncio.TimeoutError after ``timeout`` seconds."""
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+    def deliver(self, message):
+        # Runs on the subscriber's event loop; a client too slow to keep up loses updates
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            pass
+
+
+class LocalBroker:
+    """In-process pub/sub; publish() may be called from any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.channel]
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # The subscriber's event loop has already shut down
+                self.unsubscribe(subscription)
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        broker_path = getattr(settings, 'ORDER_EVENTS_BROKER', 'cloud_kitchen.events.LocalBroker')
+        _broker = import_string(broker_path)()
+    return _broker
+
+
+def order_channel(user_id):
+    return f'orders:user:{user_id}'
+
+
+def publish_order_updates(orders):
+    """Send the current status of ``orders`` to their owners once the transaction commits."""
+    orders = list(orders)
+    if orders:
+        transaction.on_commit(partial(_publish, orders))
+
+
+def _publish(orders):
+    broker = get_broker()
+    attach_etas(orders)
+    for order in orders:
+        broker.publish(order_channel(order.user_id), {
+            'id': order.id,
+            'order_number': order.order_number,
+            'status': order.status,
+            'status_display': order.get_status_display(),
+            'html': render_to_string('track_order_cards.html', {'orders': [order]}),
+        })
+
+
+async def order_event_stream(user_id):
+    """Yield Server-Sent Events for ``user_id``'s order updates until the client disconnects."""
+    with get_broker().subscribe(order_channel(user_id)) as subscription:
+        yield 'retry: 5000\n\n'
+        while True:
+            try:
+                message = await subscription.get(timeout=HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ': keep-alive\n\n'
+                continue
+            yield f'event: order\ndata: {json.dumps(message)}\n\n'
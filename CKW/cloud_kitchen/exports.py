@@ -0,0 +1,181 @@
+"""
+Streaming data exports (CSV or JSON Lines, optionally gzipped).
+
+Rows are read with ``iterator(chunk_size=...)`` and sent a chunk at a time,
+so an export of any size holds one chunk in memory and starts sending
+straight away. Orders come out one row per ordered item in CSV and as one
+object with an ``items`` list in JSON Lines.
+
+Under ASGI the stream is handed over as an async iterator; Django would
+otherwise read a synchronous one completely before sending anything.
+"""
+import csv
+import io
+import json
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from .models import ContactMessage, Order, OrderLine, Review
+
+FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'jsonl': ('application/x-ndjson; charset=utf-8', 'jsonl'),
+}
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def _order_record(order):
+    return {
+        'order_number': order.order_number,
+        'created_at': order.created_at.isoformat(),
+        'user': order.user.username,
+        'status': order.status,
+        'subtotal': str(order.subtotal),
+        'delivery_fee': str(order.delivery_fee),
+        'tax': str(order.tax),
+        'total': str(order.total),
+        'delivery_address': order.delivery_address,
+        'phone_number': order.phone_number,
+        'special_instructions': order.special_instructions,
+        'items': [{
+            'food_item_id': line.food_item_id,
+            'name': line.name,
+            'quantity': line.quantity,
+            'unit_price': str(line.unit_price),
+            'is_offer_item': line.is_offer_item,
+            'line_total': str(line.line_total),
+        } for line in OrderLine.build_for_order(order)],
+    }
+
+
+def _review_record(review):
+    return {
+        'id': review.id,
+        'created_at': review.created_at.isoformat(),
+        'user': review.user.username,
+        'stars': review.stars,
+        'message': review.message,
+    }
+
+
+def _contact_message_record(message):
+    return {
+        'id': message.id,
+        'created_at': message.created_at.isoformat(),
+        'user': message.user.username if message.user else '',
+        'name': message.name,
+        'email': message.email,
+        'subject': message.subject,
+        'message': message.message,
+        'is_read': message.is_read,
+    }
+
+
+class Export:
+    def __init__(self, name, model, record, columns, related=(), nested=None):
+        self.name = name
+        self.model = model
+        self.record = record
+        self.columns = columns
+        self.related = related
+        self.nested = nested  # list field flattened into one CSV row per entry
+
+    def get_queryset(self, queryset=None):
+        if queryset is None:
+            queryset = self.model.objects.all()
+        return queryset.select_related(*self.related).order_by('pk')
+
+    def csv_rows(self, record):
+        if not self.nested:
+            return [record]
+        entries = record[self.nested] or [{}]
+        return [record | {f'item_{key}': value for key, value in entry.items()} for entry in entries]
+
+
+ORDER_ITEM_COLUMNS = ['item_food_item_id', 'item_name', 'item_quantity', 'item_unit_price',
+                      'item_is_offer_item', 'item_line_total']
+
+EXPORTS = {
+    'orders': Export(
+        'orders', Order, _order_record,
+        ['order_number', 'created_at', 'user', 'status', 'subtotal', 'delivery_fee', 'tax', 'total',
+         'delivery_address', 'phone_number', 'special_instructions'] + ORDER_ITEM_COLUMNS,
+        related=('user',), nested='items',
+    ),
+    'reviews': Export(
+        'reviews', Review, _review_record,
+        ['id', 'created_at', 'user', 'stars', 'message'],
+        related=('user',),
+    ),
+    'contact_messages': Export(
+        'contact_messages', ContactMessage, _contact_message_record,
+        ['id', 'created_at', 'user', 'name', 'email', 'subject', 'message', 'is_read'],
+        related=('user',),
+    ),
+}
+
+
+def stream_export(name, queryset=None, fmt='csv', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the export as UTF-8 byte chunks of about ``chunk_size`` records."""
+    export = EXPORTS[name]
+    buffer = io.StringIO()
+    if fmt == 'csv':
+        writer = csv.DictWriter(buffer, fieldnames=export.columns, extrasaction='ignore')
+        writer.writeheader()
+    elif fmt != 'jsonl':
+        raise ValueError(f"Unknown export format '{fmt}'")
+
+    rows = export.get_queryset(queryset).iterator(chunk_size=chunk_size)
+    for count, obj in enumerate(rows, 1):
+        record = export.record(obj)
+        if fmt == 'csv':
+            writer.writerows(export.csv_rows(record))
+        else:
+            buffer.write(json.dumps(record, ensure_ascii=False))
+            buffer.write('\n')
+        if count % chunk_size == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def gzip_chunks(chunks):
+    """Compress a byte stream on the fly into gzip format."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes the gzip header and trailer
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def _as_async(chunks):
+    done = object()
+    while True:
+        # thread_sensitive keeps every fetch on the thread holding the request's connection
+        chunk = await sync_to_async(next, thread_sensitive=True)(chunks, done)
+        if chunk is done:
+            break
+        yield chunk
+
+
+def export_response(request, name, queryset=None, fmt='csv', compress=False):
+    """A download response streaming the ``name`` export of ``queryset``."""
+    content_type, extension = FORMATS[fmt]
+    filename = f"{name}-{timezone.localdate():%Y%m%d}.{extension}"
+    chunks = stream_export(name, queryset, fmt)
+    if compress:
+        chunks = gzip_chunks(chunks)
+        content_type = 'application/gzip'
+        filename += '.gz'
+    if isinstance(request, ASGIRequest):
+        chunks = _as_async(chunks)
+
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering the download
+    return response
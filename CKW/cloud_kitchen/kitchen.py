@@ -0,0 +1,191 @@
+"""
+Kitchen display queue.
+
+Open orders (pending, confirmed, preparing) are kept in an in-memory
+priority queue per process. Each order gets a "start by" time: its SLA
+deadline minus the estimated prep time of its slowest item category, plus
+a little for every extra unit. Orders with the least slack come first, so
+a biryani placed a few minutes ago can outrank an older order of drinks.
+
+Order saves in this process update the queue after commit; everything
+else (other processes, bulk updates) is picked up by a resync with the
+database at most every KITCHEN_QUEUE_RESYNC seconds. Kitchen screens
+polling the queue therefore never run changelist-style queries.
+"""
+import heapq
+import itertools
+import math
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from .catalog import get_snapshot
+from .models import FoodItem, Order
+
+KITCHEN_STATUSES = ('pending', 'confirmed', 'preparing')
+
+# Minutes to prepare one dish of each category; the slowest category sets the pace
+PREP_MINUTES = {
+    'starters': 10,
+    'main_course': 20,
+    'biryani': 25,
+    'burgers': 12,
+    'drinks': 3,
+    'desserts': 5,
+    'combos': 20,
+}
+DEFAULT_PREP_MINUTES = 15
+EXTRA_UNIT_MINUTES = 0.5
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_sla_minutes():
+    return getattr(settings, 'KITCHEN_SLA_MINUTES', 30)
+
+
+def get_food_item_categories():
+    """Map of food_item_id -> category slug, from the catalog snapshot."""
+    return get_snapshot('food_item_categories', lambda: dict(
+        FoodItem.objects.values_list('id', 'category__slug')
+    ))
+
+
+def estimate_prep_minutes(items, categories):
+    slowest = 0
+    units = 0
+    for item in items:
+        category = categories.get(item.get('food_item_id'))
+        slowest = max(slowest, PREP_MINUTES.get(category, DEFAULT_PREP_MINUTES))
+        units += item.get('quantity', 1)
+    return slowest + EXTRA_UNIT_MINUTES * max(units - 1, 0)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class KitchenQueue:
+    def __init__(self):
+        self.token = uuid.uuid4().hex[:8]  # tells processes apart in ETags
+        self.version = 0
+        self.synced_at = 0
+        self._entries = {}   # order id -> entry dict
+        self._heap = []      # (start_by, created_at, order id, push number, entry) with stale entries skipped lazily
+        self._pushes = itertools.count()  # breaks ties when an order is pushed again
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _make_entry(self, order, categories):
+        prep_minutes = estimate_prep_minutes(order.items, categories)
+        deadline = order.created_at + timedelta(minutes=get_sla_minutes())
+        return {
+            'id': order.id,
+            'order_number': order.order_number,
+            'status': order.status,
+            'created_at': order.created_at,
+            'prep_minutes': prep_minutes,
+            'start_by': deadline - timedelta(minutes=prep_minutes),
+            'deadline': deadline,
+            'items': [{'name': item['name'], 'quantity': item['quantity']} for item in order.items],
+        }
+
+    def _push(self, entry):
+        self._entries[entry['id']] = entry
+        heapq.heappush(self._heap, (entry['start_by'], entry['created_at'], entry['id'], next(self._pushes), entry))
+
+    def update(self, order):
+        """Add, move or drop ``order`` according to its current status."""
+        with self._lock:
+            current = self._entries.get(order.id)
+            if order.status not in KITCHEN_STATUSES:
+                if current is not None:
+                    del self._entries[order.id]
+                    self.version += 1
+                return
+            if current is not None and current['status'] == order.status:
+                return
+            if 'items' not in order.__dict__:
+                return  # Loaded without items; the next resync picks it up
+            self._push(self._make_entry(order, get_food_item_categories()))
+            self.version += 1
+
+    def resync(self):
+        """Reload open orders from the database (one indexed query)."""
+        orders = Order.objects.filter(status__in=KITCHEN_STATUSES).only(
+            'id', 'order_number', 'status', 'created_at', 'items'
+        )
+        categories = get_food_item_categories()
+        entries = {order.id: self._make_entry(order, categories) for order in orders}
+        with self._lock:
+            changed = {
+                (entry['id'], entry['status']) for entry in entries.values()
+            } != {
+                (entry['id'], entry['status']) for entry in self._entries.values()
+            }
+            if changed:
+                self._entries = {}
+                self._heap = []
+                for entry in entries.values():
+                    self._push(entry)
+                self.version += 1
+            self.synced_at = time.monotonic()
+
+    def ordered(self, limit=None):
+        """Open orders, most urgent first (at most ``limit`` of them)."""
+        with self._lock:
+            if len(self._heap) > 2 * len(self._entries) + 16:
+                # Drop stale heap entries left behind by updates and removals
+                self._heap = [item for item in self._heap if self._entries.get(item[2]) is item[4]]
+                heapq.heapify(self._heap)
+            live = [item for item in self._heap if self._entries.get(item[2]) is item[4]]
+        if limit is None:
+            limit = len(live)
+        return [item[4] for item in heapq.nsmallest(limit, live, key=lambda item: item[:3])]
+
+    def stats(self, now):
+        entries = list(self._entries.values())
+        waits = sorted((now - entry['created_at']).total_seconds() / 60 for entry in entries)
+        by_status = {status: 0 for status in KITCHEN_STATUSES}
+        for entry in entries:
+            by_status[entry['status']] += 1
+        return {
+            'depth': len(entries),
+            'by_status': by_status,
+            'late': sum(1 for entry in entries if entry['start_by'] < now),
+            'wait_minutes': {
+                'p50': percentile(waits, 0.5),
+                'p90': percentile(waits, 0.9),
+                'p99': percentile(waits, 0.99),
+                'max': waits[-1] if waits else None,
+            },
+        }
+
+
+def get_kitchen_queue():
+    """This process's queue, resynced with the database when it is due."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = KitchenQueue()
+        queue = _queue
+    if time.monotonic() - queue.synced_at >= getattr(settings, 'KITCHEN_QUEUE_RESYNC', 30):
+        queue.resync()
+    return queue
+
+
+def update_kitchen_queue(orders):
+    """Reflect status changes of ``orders`` in this process's queue once the transaction commits."""
+    orders = list(orders)
+    if orders and _queue is not None:
+        transaction.on_commit(lambda: [_queue.update(order) for order in orders])
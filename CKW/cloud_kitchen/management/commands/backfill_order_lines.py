@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from cloud_kitchen.models import FoodItem, Order, OrderLine
+
+
+class Command(BaseCommand):
+    help = "Create OrderLine rows for orders placed before order lines were recorded"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        food_item_ids = set(FoodItem.objects.values_list('id', flat=True))
+        orders = Order.objects.filter(
+            ~Exists(OrderLine.objects.filter(order=OuterRef('pk')))
+        ).only('id', 'items', 'created_at').order_by('id')
+
+        order_count = line_count = 0
+        pending = []
+        for order in orders.iterator(chunk_size=chunk_size):
+            order_count += 1
+            pending.extend(OrderLine.build_for_order(order, food_item_ids))
+            if len(pending) >= chunk_size:
+                line_count += self._write(pending, chunk_size)
+                pending = []
+        if pending:
+            line_count += self._write(pending, chunk_size)
+
+        self.stdout.write(self.style.SUCCESS(f"Backfilled {line_count} line(s) for {order_count} order(s)."))
+
+    def _write(self, lines, chunk_size):
+        with transaction.atomic():
+            OrderLine.objects.bulk_create(lines, batch_size=chunk_size)
+        return len(lines)
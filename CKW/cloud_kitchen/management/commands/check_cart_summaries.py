@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Sum
+from cloud_kitchen.models import Cart, CartItem
+
+
+class Command(BaseCommand):
+    help = "Compare stored cart summaries against their cart items and optionally repair them"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help="Rewrite summaries that have drifted")
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        carts = Cart.objects.annotate(
+            counted_items=Sum('cartitem__quantity'),
+            counted_subtotal=Sum(CartItem.line_total_expression('cartitem__')),
+        ).only('id', 'item_count', 'subtotal')
+
+        checked = drifted = 0
+        for cart in carts.iterator(chunk_size=options['chunk_size']):
+            checked += 1
+            counted_items = cart.counted_items or 0
+            counted_subtotal = cart.counted_subtotal or 0
+            if cart.item_count == counted_items and cart.subtotal == counted_subtotal:
+                continue
+            drifted += 1
+            self.stdout.write(
+                f"Cart {cart.id}: stored {cart.item_count} item(s) / ₹{cart.subtotal}, "
+                f"actual {counted_items} item(s) / ₹{counted_subtotal}"
+            )
+            if options['fix']:
+                Cart.objects.filter(pk=cart.pk).update(item_count=counted_items, subtotal=counted_subtotal)
+
+        action = "repaired" if options['fix'] else "found"
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} cart(s), {action} {drifted} drifted summary(ies)."))
@@ -0,0 +1,48 @@
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from cloud_kitchen.exports import DEFAULT_CHUNK_SIZE, EXPORTS, FORMATS, gzip_chunks, stream_export
+
+
+class Command(BaseCommand):
+    help = "Stream orders, reviews or contact messages to a CSV or JSON Lines file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('export', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--gzip', action='store_true', help="Compress the output with gzip")
+        parser.add_argument('--since', type=date.fromisoformat, help="Only rows created on or after this date (YYYY-MM-DD)")
+        parser.add_argument('--output', '-o', help="File to write; defaults to standard output")
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        export = EXPORTS[options['export']]
+        queryset = export.get_queryset()
+        if options['since']:
+            queryset = queryset.filter(created_at__date__gte=options['since'])
+
+        chunks = stream_export(export.name, queryset, options['format'], options['chunk_size'])
+        if options['gzip']:
+            chunks = gzip_chunks(chunks)
+
+        if options['output']:
+            try:
+                output = open(options['output'], 'wb')
+            except OSError as e:
+                raise CommandError(e)
+        else:
+            output = sys.stdout.buffer
+        size = 0
+        try:
+            for chunk in chunks:
+                output.write(chunk)
+                size += len(chunk)
+        finally:
+            if options['output']:
+                output.close()
+            else:
+                output.flush()
+
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f"Wrote {size} bytes to {options['output']}."))
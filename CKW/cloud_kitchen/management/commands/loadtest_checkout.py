@@ -0,0 +1,87 @@
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from cloud_kitchen.models import FoodItem, Order, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Run concurrent add-to-cart + checkout loops through the full request stack "
+        "against the configured database and report throughput, latency and lock errors. "
+        "Compare runs with CKW_SQLITE_TUNING=0 / CKW_DB_ENGINE=postgres to see the effect "
+        "of the database profile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=8, help="Concurrent simulated customers")
+        parser.add_argument('--orders', type=int, default=10, help="Checkouts per customer")
+        parser.add_argument('--keep', action='store_true', help="Keep the load-test users and their orders")
+
+    def handle(self, *args, **options):
+        food_item_ids = list(FoodItem.objects.filter(is_available=True).values_list('id', flat=True)[:3])
+        if not food_item_ids:
+            raise CommandError("Add some available food items before running the load test.")
+
+        run_id = uuid.uuid4().hex[:8]
+        users = [
+            User.objects.create(username=f'loadtest_{run_id}_{i}', password='!')
+            for i in range(options['users'])
+        ]
+        latencies = []
+        errors = Counter()
+        lock = threading.Lock()
+
+        def customer(user):
+            client = Client(HTTP_HOST='localhost', raise_request_exception=False)
+            session = client.session
+            session['user_id'] = user.id
+            session['username'] = user.username
+            session.save()
+            for _ in range(options['orders']):
+                started = time.perf_counter()
+                try:
+                    for food_item_id in food_item_ids:
+                        client.post(f'/add-to-cart/{food_item_id}/')
+                    response = client.post('/order-confirmation/')
+                    error = None if response.status_code == 200 and response.json().get('success') else f"HTTP {response.status_code}"
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                elapsed = time.perf_counter() - started
+                with lock:
+                    if error:
+                        errors[error] += 1
+                    else:
+                        latencies.append(elapsed)
+            connection.close()
+
+        threads = [threading.Thread(target=customer, args=(user,)) for user in users]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall_time = time.perf_counter() - started
+
+        if not options['keep']:
+            with transaction.atomic():
+                # Deleted through the ORM so the pre_delete receiver takes their sales out of the rollups
+                Order.objects.filter(user__in=users).delete()
+                User.objects.filter(id__in=[user.id for user in users]).delete()
+
+        attempted = options['users'] * options['orders']
+        self.stdout.write(f"Database: {connection.vendor} ({connection.settings_dict['NAME']})")
+        self.stdout.write(f"Checkouts: {len(latencies)}/{attempted} succeeded in {wall_time:.2f}s "
+                          f"({len(latencies) / wall_time:.1f}/s)")
+        if latencies:
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            self.stdout.write(f"Latency: p50 {statistics.median(latencies) * 1000:.0f} ms, "
+                              f"p95 {p95 * 1000:.0f} ms, max {latencies[-1] * 1000:.0f} ms")
+        for error, count in errors.most_common(5):
+            self.stdout.write(self.style.ERROR(f"{count}x {error}"))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from cloud_kitchen.models import Review, ReviewStats
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored review count, star total and star histogram from all reviews"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        reviews = Review.objects.order_by('id').values_list('id', 'stars')
+        counts = {stars: 0 for stars in range(1, 6)}
+
+        # Reviews are read in id ranges outside the transaction so writers are
+        # only held up while the totals are stored
+        last_id = Review.objects.aggregate(last=Max('id'))['last'] or 0
+        start = 0
+        while start < last_id:
+            chunk = list(reviews.filter(id__gt=start, id__lte=last_id)[:chunk_size])
+            if not chunk:
+                break
+            for review_id, stars in chunk:
+                counts[stars] += 1
+            start = chunk[-1][0]
+
+        with transaction.atomic():
+            ReviewStats.objects.get_or_create(pk=1)
+            stats = ReviewStats.objects.select_for_update().get(pk=1)
+            # Reviews submitted while the table was being read
+            for review_id, stars in reviews.filter(id__gt=last_id):
+                counts[stars] += 1
+
+            stats.review_count = sum(counts.values())
+            stats.star_total = sum(stars * count for stars, count in counts.items())
+            for stars, count in counts.items():
+                setattr(stats, f'star_{stars}', count)
+            stats.save()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt review stats: {stats.review_count} review(s), average {stats.get_average()}."
+        ))
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+from cloud_kitchen.models import FoodItem, ItemSalesRollup, Order, SalesRollup
+from cloud_kitchen.sales import apply_sales, collect_sales
+
+
+class Command(BaseCommand):
+    help = "Recompute the hourly and daily sales rollups from all orders"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        food_item_ids = set(FoodItem.objects.values_list('id', flat=True))
+        orders = Order.objects.exclude(status='cancelled').only(
+            'id', 'items', 'created_at', 'subtotal', 'delivery_fee', 'tax', 'total'
+        ).order_by('id')
+
+        # Orders are read in id ranges so no query holds the whole history
+        totals, items = {}, {}
+        last_id = Order.objects.aggregate(last=Max('id'))['last'] or 0
+        order_count = 0
+        start = 0
+        while start < last_id:
+            chunk = list(orders.filter(id__gt=start, id__lte=last_id)[:chunk_size])
+            if not chunk:
+                break
+            collect_sales(chunk, totals, items, food_item_ids=food_item_ids)
+            order_count += len(chunk)
+            start = chunk[-1].id
+
+        with transaction.atomic():
+            SalesRollup.objects.all().delete()
+            ItemSalesRollup.objects.all().delete()
+            SalesRollup.objects.bulk_create([
+                SalesRollup(period=period, period_start=period_start, **delta)
+                for (period, period_start), delta in totals.items()
+            ], batch_size=chunk_size)
+            ItemSalesRollup.objects.bulk_create([
+                ItemSalesRollup(period=period, period_start=period_start, food_item_id=food_item_id, **delta)
+                for (period, period_start, food_item_id), delta in items.items()
+            ], batch_size=chunk_size)
+            # Orders placed while the history was being read
+            late_totals, late_items = {}, {}
+            collect_sales(orders.filter(id__gt=last_id), late_totals, late_items, food_item_ids=food_item_ids)
+            apply_sales(late_totals, late_items)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(totals)} sales rollup(s) and {len(items)} item rollup(s) from {order_count} order(s)."
+        ))
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Prefetch
+from cloud_kitchen.eta import P2Quantile, QUANTILES, STAGE_TIMINGS_KEY, dump_sketch, stage_samples
+from cloud_kitchen.kitchen import get_food_item_categories
+from cloud_kitchen.models import Order, OrderStatusEvent, StageTiming
+
+
+class Command(BaseCommand):
+    help = "Recalibrate the delivery estimate timings from the order status log in one pass"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        categories = get_food_item_categories()
+        estimators = {}
+        counts = {}
+
+        events = OrderStatusEvent.objects.only('order_id', 'from_status', 'to_status', 'created_at').order_by('created_at', 'id')
+        orders = Order.objects.filter(
+            Exists(OrderStatusEvent.objects.filter(order=OuterRef('pk')))
+        ).only('id', 'created_at', 'items').order_by('id').prefetch_related(
+            Prefetch('status_events', queryset=events)
+        )
+        for order in orders.iterator(chunk_size=options['chunk_size']):
+            entered_at = order.created_at
+            for event in order.status_events.all():
+                for slug, stage, seconds in stage_samples(
+                    order, event.from_status, event.to_status, entered_at, event.created_at, categories
+                ):
+                    key = (slug, stage)
+                    if key not in estimators:
+                        estimators[key] = {p: P2Quantile(p) for p in QUANTILES}
+                        counts[key] = 0
+                    for estimator in estimators[key].values():
+                        estimator.add(seconds)
+                    counts[key] += 1
+                entered_at = event.created_at
+
+        with transaction.atomic():
+            list(StageTiming.objects.select_for_update())
+            StageTiming.objects.all().delete()
+            StageTiming.objects.bulk_create([
+                StageTiming(category_slug=slug, stage=stage, sample_count=counts[(slug, stage)],
+                            sketch=dump_sketch(sketch))
+                for (slug, stage), sketch in estimators.items()
+            ])
+            transaction.on_commit(lambda: cache.delete(STAGE_TIMINGS_KEY))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {len(estimators)} stage timing(s) from {sum(counts.values())} sample(s)."
+        ))
@@ -0,0 +1,57 @@
+"""
+Request-scoped resolution of the logged-in User.
+
+Views authenticate through ``request.session['user_id']``. SessionUserMiddleware
+attaches ``request.session_user``, a lazy object that loads that User at most
+once per request; ``get_session_user()`` is the non-lazy accessor views use.
+Setting SESSION_USER_CACHE_TTL (seconds) additionally keeps recently loaded
+users in a per-process cache so repeat requests can skip the query.
+"""
+import copy
+import time
+
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+from .models import User
+
+# user id -> (expires at, User) for the optional per-process cache
+_user_cache = {}
+
+
+def get_session_user(request):
+    """Return the User for the request's session, or None when not logged in."""
+    if not hasattr(request, '_session_user'):
+        request._session_user = _load_user(request.session.get('user_id'))
+    return request._session_user
+
+
+def forget_user(user_id):
+    """Drop a user from this process's cache, e.g. after it was saved."""
+    _user_cache.pop(user_id, None)
+
+
+def _load_user(user_id):
+    if not user_id:
+        return None
+
+    ttl = getattr(settings, 'SESSION_USER_CACHE_TTL', 0)
+    if ttl:
+        cached = _user_cache.get(user_id)
+        if cached is not None and cached[0] > time.monotonic():
+            # Hand out a copy so changes made by one request stay local to it
+            return copy.copy(cached[1])
+
+    user = User.objects.filter(id=user_id).first()
+    if ttl and user is not None:
+        _user_cache[user_id] = (time.monotonic() + ttl, user)
+        return copy.copy(user)
+    return user
+
+
+class SessionUserMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.session_user = SimpleLazyObject(lambda: get_session_user(request))
+        return self.get_response(request)
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.4 on 2026-10-18 06:15
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def backfill_cart_summaries(apps, schema_editor):
+    Cart = apps.get_model('cloud_kitchen', 'Cart')
+    CartItem = apps.get_model('cloud_kitchen', 'CartItem')
+    for cart in Cart.objects.all():
+        item_count = 0
+        subtotal = Decimal('0.00')
+        for item in CartItem.objects.filter(cart=cart).select_related('food_item'):
+            unit_price = item.offer_price if item.is_offer_item and item.offer_price else item.food_item.price
+            item_count += item.quantity
+            subtotal += item.quantity * unit_price
+        Cart.objects.filter(pk=cart.pk).update(item_count=item_count, subtotal=subtotal)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cloud_kitchen', '0014_user_date_joined_user_last_login'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='subtotal',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=10),
+        ),
+        migrations.RunPython(backfill_cart_summaries, migrations.RunPython.noop),
+    ]
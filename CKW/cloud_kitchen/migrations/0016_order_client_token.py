@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-18 07:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cloud_kitchen', '0015_cart_item_count_cart_subtotal'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='client_token',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.4 on 2026-10-18 08:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cloud_kitchen', '0017_ordersequence'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderLine',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('quantity', models.PositiveIntegerField()),
+                ('unit_price', models.DecimalField(decimal_places=2, max_digits=8)),
+                ('is_offer_item', models.BooleanField(default=False)),
+                ('line_total', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('created_at', models.DateTimeField()),
+                ('food_item', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='order_lines', to='cloud_kitchen.fooditem')),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lines', to='cloud_kitchen.order')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['food_item', 'created_at'], name='cloud_kitch_food_it_52b791_idx'), models.Index(fields=['created_at'], name='cloud_kitch_created_6b814b_idx')],
+            },
+        ),
+    ]
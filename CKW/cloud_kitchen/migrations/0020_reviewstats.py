@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:10
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def populate_review_stats(apps, schema_editor):
+    Review = apps.get_model('cloud_kitchen', 'Review')
+    ReviewStats = apps.get_model('cloud_kitchen', 'ReviewStats')
+    stats = ReviewStats(pk=1)
+    for row in Review.objects.order_by().values('stars').annotate(count=Count('id')):
+        setattr(stats, f"star_{row['stars']}", row['count'])
+    totals = Review.objects.aggregate(count=Count('id'), total=Sum('stars'))
+    stats.review_count = totals['count']
+    stats.star_total = totals['total'] or 0
+    stats.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cloud_kitchen', '0019_order_user_recent_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReviewStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('review_count', models.PositiveIntegerField(default=0)),
+                ('star_total', models.PositiveIntegerField(default=0)),
+                ('star_1', models.PositiveIntegerField(default=0)),
+                ('star_2', models.PositiveIntegerField(default=0)),
+                ('star_3', models.PositiveIntegerField(default=0)),
+                ('star_4', models.PositiveIntegerField(default=0)),
+                ('star_5', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Review stats',
+            },
+        ),
+        migrations.RunPython(populate_review_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cloud_kitchen', '0020_reviewstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='offer',
+            name='daily_end',
+            field=models.TimeField(blank=True, help_text='Daily slot end; may be past midnight', null=True),
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='daily_start',
+            field=models.TimeField(blank=True, help_text='Daily slot start, e.g. 17:00 for a happy hour', null=True),
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='ends_at',
+            field=models.DateTimeField(blank=True, help_text='Offer stops applying at this moment', null=True),
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='starts_at',
+            field=models.DateTimeField(blank=True, help_text='Offer applies from this moment', null=True),
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='weekdays',
+            field=models.CharField(blank=True, default='', help_text="Days the daily slot runs, 0=Monday ... 6=Sunday (e.g. '01234'); empty for every day", max_length=7),
+        ),
+    ]
@@ -1,4 +1,9 @@
-from django.db import models
+from datetime import datetime, timedelta
+from decimal import Decimal
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
 from django.contrib.auth.hashers import make_password, check_password
 from django.conf import settings
 from django.utils import timezone
@@ -68,28 +73,235 @@ class FoodItem(models.Model):
 class Cart(models.Model):
     user = models.OneToOneField('User', on_delete=models.CASCADE, null=True, blank=True)
     session_key = models.CharField(max_length=40, null=True, blank=True, unique=True)
+    # Denormalized summary kept in step with the cart's items by the cart endpoints
+    item_count = models.PositiveIntegerField(default=0)
+    subtotal = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Cart for {self.user.username if self.user else 'Anonymous'}"
 
+    DELIVERY_FEE = Decimal('40.00')
+    TAX_RATE = Decimal('0.18')  # 18% GST
+
+    def get_totals(self, items=None):
+        """Return item count, subtotal, delivery fee, tax and total for the cart.
+
+        When ``items`` (cart items loaded with their food item) is given the
+        totals are computed in one pass over it, otherwise a single aggregate
+        query is run against the cart's rows.
+        """
+        if items is None:
+            aggregates = self.cartitem_set.aggregate(
+                item_count=Sum('quantity'),
+                subtotal=Sum(CartItem.line_total_expression()),
+            )
+            item_count = aggregates['item_count'] or 0
+            subtotal = aggregates['subtotal'] or Decimal('0.00')
+        else:
+            item_count = 0
+            subtotal = Decimal('0.00')
+            for item in items:
+                item_count += item.quantity
+                subtotal += item.get_total_price()
+        return self.build_totals(item_count, subtotal)
+
+    @classmethod
+    def build_totals(cls, item_count, subtotal):
+        tax = round(subtotal * cls.TAX_RATE, 2)
+        return {
+            'item_count': item_count,
+            'subtotal': subtotal,
+            'delivery_fee': cls.DELIVERY_FEE,
+            'tax': tax,
+            'total': subtotal + cls.DELIVERY_FEE + tax,
+        }
+
+    def get_summary(self):
+        """Totals from the stored summary columns, without touching the cart items."""
+        return self.build_totals(self.item_count, self.subtotal)
+
+    def adjust_summary(self, item_delta, subtotal_delta):
+        """Apply an incremental change to the stored summary and reload it."""
+        Cart.objects.filter(pk=self.pk).update(
+            item_count=F('item_count') + item_delta,
+            subtotal=F('subtotal') + subtotal_delta,
+            updated_at=timezone.now(),
+        )
+        self.refresh_from_db(fields=['item_count', 'subtotal', 'updated_at'])
+
+    def add_item(self, food_item, is_offer_item=False, offer_price=None):
+        """Add one unit of ``food_item`` to the cart without a read-modify-write race.
+
+        The quantity is incremented in the database with an F() expression.
+        When there is no line yet one is inserted, and an insert that loses a
+        race against a concurrent request falls back to the increment. Locks
+        taken by the updates only last for this short transaction.
+        """
+        items = self.cartitem_set.filter(food_item=food_item)
+        with transaction.atomic():
+            # Repricing an existing line is its own conditional update so we
+            # know whether the units already in the cart changed price
+            repriced = bool(is_offer_item) and items.filter(is_offer_item=False).update(
+                is_offer_item=True, offer_price=offer_price
+            ) > 0
+            if items.update(quantity=F('quantity') + 1):
+                cart_item = items.get()
+                cart_item.food_item = food_item
+                previous_unit_price = food_item.price if repriced else cart_item.get_unit_price()
+                previous_total = (cart_item.quantity - 1) * previous_unit_price
+            else:
+                try:
+                    with transaction.atomic():
+                        cart_item = CartItem.objects.create(
+                            cart=self,
+                            food_item=food_item,
+                            quantity=1,
+                            is_offer_item=is_offer_item,
+                            offer_price=offer_price,
+                        )
+                except IntegrityError:
+                    # A concurrent request created the line first; add to it instead
+                    return self.add_item(food_item, is_offer_item, offer_price)
+                previous_total = Decimal('0.00')
+            self.adjust_summary(1, cart_item.get_total_price() - previous_total)
+        return cart_item
+
+    def apply_operations(self, operations):
+        """Apply a batch of line changes in one transaction and update the summary once.
+
+        Each operation is a dict with ``food_item_id`` and one of ``delta``,
+        ``set_quantity`` or ``remove``. Operations run in order, and a line
+        whose quantity ends at zero or below is removed. New lines take the
+        item's best active offer, as add_item callers do. Returns the final
+        line for every food item touched (``None`` for removed lines).
+        Raises ValueError for malformed operations or unknown food items.
+        """
+        from .catalog import get_offer_index  # catalog imports these models
+
+        quantities = {}
+        for operation in operations:
+            try:
+                food_item_id = int(operation['food_item_id'])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError('Each operation needs a valid food_item_id')
+            quantities.setdefault(food_item_id, None)
+
+        with transaction.atomic():
+            lines = {
+                line.food_item_id: line
+                for line in self.cartitem_set.select_related('food_item')
+                .select_for_update(of=('self',))
+                .filter(food_item_id__in=quantities)
+            }
+            previous_count = sum(line.quantity for line in lines.values())
+            previous_subtotal = sum((line.get_total_price() for line in lines.values()), Decimal('0.00'))
+
+            for food_item_id, line in lines.items():
+                quantities[food_item_id] = line.quantity
+            for operation in operations:
+                food_item_id = int(operation['food_item_id'])
+                current = quantities[food_item_id] or 0
+                try:
+                    if operation.get('remove'):
+                        quantities[food_item_id] = 0
+                    elif 'set_quantity' in operation:
+                        quantities[food_item_id] = int(operation['set_quantity'])
+                    elif 'delta' in operation:
+                        quantities[food_item_id] = current + int(operation['delta'])
+                    else:
+                        raise ValueError('Each operation needs delta, set_quantity or remove')
+                except (TypeError, ValueError) as e:
+                    raise ValueError(f'Invalid operation for item {food_item_id}: {e}')
+
+            new_ids = [fid for fid, quantity in quantities.items() if fid not in lines and quantity and quantity > 0]
+            food_items = FoodItem.objects.filter(is_available=True).in_bulk(new_ids)
+            if len(food_items) != len(new_ids):
+                raise ValueError('Item not found')
+            offer_index = get_offer_index() if new_ids else {}
+
+            removed, changed, created = [], [], []
+            result = {}
+            for food_item_id, quantity in quantities.items():
+                line = lines.get(food_item_id)
+                if quantity is None or quantity <= 0:
+                    if line is not None:
+                        removed.append(line.pk)
+                    result[food_item_id] = None
+                elif line is None:
+                    offer = offer_index.get(food_item_id)
+                    line = CartItem(
+                        cart=self,
+                        food_item=food_items[food_item_id],
+                        quantity=quantity,
+                        is_offer_item=offer is not None,
+                        offer_price=offer['discounted_price'] if offer else None,
+                    )
+                    created.append(line)
+                    result[food_item_id] = line
+                else:
+                    if line.quantity != quantity:
+                        line.quantity = quantity
+                        changed.append(line)
+                    result[food_item_id] = line
+
+            if removed:
+                CartItem.objects.filter(pk__in=removed).delete()
+            if changed:
+                CartItem.objects.bulk_update(changed, ['quantity'])
+            if created:
+                CartItem.objects.bulk_create(created)
+
+            lines_now = [line for line in result.values() if line is not None]
+            self.adjust_summary(
+                sum(line.quantity for line in lines_now) - previous_count,
+                sum((line.get_total_price() for line in lines_now), Decimal('0.00')) - previous_subtotal,
+            )
+        return result
+
+    def refresh_summary(self):
+        """Recompute the stored summary from the cart items."""
+        totals = self.get_totals()
+        self.item_count = totals['item_count']
+        self.subtotal = totals['subtotal']
+        self.save(update_fields=['item_count', 'subtotal', 'updated_at'])
+
+    @classmethod
+    def refresh_summaries(cls, carts):
+        """Recompute the stored summary of every cart in ``carts`` with one UPDATE."""
+        lines = CartItem.objects.filter(cart=OuterRef('pk')).order_by().values('cart')
+        return carts.update(
+            item_count=Coalesce(Subquery(lines.annotate(total=Sum('quantity')).values('total')), 0),
+            subtotal=Coalesce(
+                Subquery(lines.annotate(total=Sum(CartItem.line_total_expression())).values('total')),
+                Value(Decimal('0.00')),
+                output_field=DecimalField(max_digits=10, decimal_places=2),
+            ),
+            updated_at=timezone.now(),
+        )
+
+    def empty(self):
+        """Delete every item in the cart and reset the stored summary."""
+        self.cartitem_set.all().delete()
+        self.item_count = 0
+        self.subtotal = Decimal('0.00')
+        self.save(update_fields=['item_count', 'subtotal', 'updated_at'])
+
     def get_total_items(self):
-        return sum(item.quantity for item in self.cartitem_set.all())
+        return self.get_totals()['item_count']
 
     def get_subtotal(self):
-        return sum(item.get_total_price() for item in self.cartitem_set.all())
+        return self.get_totals()['subtotal']
 
     def get_delivery_fee(self):
-        from decimal import Decimal
-        return Decimal('40.00')
+        return self.DELIVERY_FEE
 
     def get_tax(self):
-        from decimal import Decimal
-        return round(self.get_subtotal() * Decimal('0.18'), 2)  # 18% GST
+        return self.get_totals()['tax']
 
     def get_total(self):
-        return self.get_subtotal() + self.get_delivery_fee() + self.get_tax()
+        return self.get_totals()['total']
 
 class CartItem(models.Model):
     cart = models.ForeignKey(Cart, on_delete=models.CASCADE)
@@ -106,26 +318,94 @@ class CartItem(models.Model):
     def __str__(self):
         return f"{self.quantity}x {self.food_item.name}"
 
-    def get_total_price(self):
+    def get_unit_price(self):
         if self.is_offer_item and self.offer_price:
-            return self.quantity * self.offer_price
-        return self.quantity * self.food_item.price
+            return self.offer_price
+        return self.food_item.price
+
+    def get_total_price(self):
+        return self.quantity * self.get_unit_price()
+
+    @staticmethod
+    def line_total_expression(prefix=''):
+        """Database expression mirroring get_total_price(), for use in aggregates.
+
+        ``prefix`` is the lookup path to the cart item, e.g. ``'cartitem__'``
+        when aggregating from the Cart side.
+        """
+        return Case(
+            When(
+                Q(**{f'{prefix}is_offer_item': True, f'{prefix}offer_price__gt': 0}),
+                then=F(f'{prefix}quantity') * F(f'{prefix}offer_price'),
+            ),
+            default=F(f'{prefix}quantity') * F(f'{prefix}food_item__price'),
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        )
 
 class Offer(models.Model):
     food_item = models.ForeignKey(FoodItem, on_delete=models.CASCADE, related_name='offers')
     discount_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=40.00, help_text="Discount percentage (e.g., 40.00 for 40%)")
     is_active = models.BooleanField(default=True)
+    # Optional schedule; an active offer with none of these set always applies
+    starts_at = models.DateTimeField(null=True, blank=True, help_text="Offer applies from this moment")
+    ends_at = models.DateTimeField(null=True, blank=True, help_text="Offer stops applying at this moment")
+    daily_start = models.TimeField(null=True, blank=True, help_text="Daily slot start, e.g. 17:00 for a happy hour")
+    daily_end = models.TimeField(null=True, blank=True, help_text="Daily slot end; may be past midnight")
+    weekdays = models.CharField(max_length=7, blank=True, default='', help_text="Days the daily slot runs, 0=Monday ... 6=Sunday (e.g. '01234'); empty for every day")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"{self.discount_percentage}% off on {self.food_item.name}"
 
+    def clean(self):
+        if (self.daily_start is None) != (self.daily_end is None):
+            raise ValidationError("Set both the daily start and end time, or neither.")
+        if self.starts_at and self.ends_at and self.ends_at <= self.starts_at:
+            raise ValidationError("The offer must end after it starts.")
+        if any(day not in '0123456' for day in self.weekdays):
+            raise ValidationError("Weekdays may only contain the digits 0-6.")
+
     def get_discounted_price(self):
-        from decimal import Decimal
         discount = (self.discount_percentage / Decimal('100')) * self.food_item.price
         return round(self.food_item.price - discount, 2)
 
+    def is_live(self, at=None):
+        """Whether the offer applies at ``at`` (default: now), taking its schedule into account."""
+        at = at or timezone.now()
+        if not self.is_active:
+            return False
+        if self.starts_at and at < self.starts_at:
+            return False
+        if self.ends_at and at >= self.ends_at:
+            return False
+        if self.daily_start is None:
+            return True
+        return any(start <= at < end for start, end in self._daily_slots(at))
+
+    def next_change(self, after=None):
+        """The next moment after ``after`` at which is_live() may change, or None if it never will."""
+        after = after or timezone.now()
+        boundaries = [moment for moment in (self.starts_at, self.ends_at) if moment]
+        if self.daily_start is not None:
+            for start, end in self._daily_slots(after, days_ahead=7):
+                boundaries += [start, end]
+        upcoming = [moment for moment in boundaries if moment > after]
+        return min(upcoming) if upcoming else None
+
+    def _daily_slots(self, at, days_ahead=0):
+        # Slots starting from the day before ``at`` (an overnight slot may still be running)
+        today = timezone.localtime(at).date()
+        for offset in range(-1, days_ahead + 1):
+            day = today + timedelta(days=offset)
+            if self.weekdays and str(day.weekday()) not in self.weekdays:
+                continue
+            end_day = day if self.daily_end > self.daily_start else day + timedelta(days=1)
+            yield (
+                timezone.make_aware(datetime.combine(day, self.daily_start)),
+                timezone.make_aware(datetime.combine(end_day, self.daily_end)),
+            )
+
     class Meta:
         ordering = ['-created_at']
 
@@ -138,9 +418,14 @@ class Order(models.Model):
         ('delivered', 'Delivered'),
         ('cancelled', 'Cancelled'),
     ]
+    # Orders only move forward through these stages; any stage before
+    # delivery can also be cancelled. Delivered and cancelled are final.
+    STATUS_FLOW = ['pending', 'confirmed', 'preparing', 'ready', 'delivered']
 
     user = models.ForeignKey('User', on_delete=models.CASCADE)
     order_number = models.CharField(max_length=20, unique=True)
+    # Idempotency key sent by the cart page so a retried checkout returns the same order
+    client_token = models.CharField(max_length=64, null=True, blank=True, editable=False)
     items = models.JSONField()  # Store cart items as JSON
     subtotal = models.DecimalField(max_digits=10, decimal_places=2)
     delivery_fee = models.DecimalField(max_digits=10, decimal_places=2, default=40.00)
@@ -153,18 +438,203 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Order history pages: WHERE user = ? ORDER BY created_at DESC, id DESC
+            models.Index(fields=['user', '-created_at', '-id'], name='order_user_recent_idx'),
+            # Open orders for the kitchen queue: WHERE status IN (...)
+            models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+        ]
+        # Tokens only have to be unique per customer; NULLs (no token) never clash
+        unique_together = ['user', 'client_token']
+
     def __str__(self):
         return f"Order {self.order_number} - {self.user.username}"
 
+    @classmethod
+    def allowed_transitions(cls, status):
+        """Statuses an order in ``status`` may move to."""
+        if status not in cls.STATUS_FLOW or status == 'delivered':
+            return ()
+        return tuple(cls.STATUS_FLOW[cls.STATUS_FLOW.index(status) + 1:]) + ('cancelled',)
+
+    @classmethod
+    def statuses_allowing(cls, status):
+        """Statuses from which an order may move to ``status``."""
+        return [current for current, _ in cls.STATUS_CHOICES if status in cls.allowed_transitions(current)]
+
+    def can_transition_to(self, status):
+        return status in self.allowed_transitions(self.status)
+
+    @staticmethod
+    def generate_order_number():
+        """Return the next order number for today, e.g. ``CKW20261018000042``.
+
+        Numbers come from a per-day counter, so they never collide across
+        workers and sort in the order they were issued.
+        """
+        day = timezone.localdate()
+        return 'CKW' + day.strftime('%Y%m%d') + f'{OrderSequence.next_value(day):06d}'
+
     def save(self, *args, **kwargs):
         if not self.order_number:
-            # Generate order number
-            import random
-            import string
-            from datetime import datetime
-            order_number = 'CKW' + datetime.now().strftime('%Y%m%d') + ''.join(random.choices(string.digits, k=4))
-            self.order_number = order_number
+            self.order_number = self.generate_order_number()
         super().save(*args, **kwargs)
+
+class OrderLine(models.Model):
+    """One item of an order, kept alongside ``Order.items`` for SQL reporting."""
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='lines')
+    food_item = models.ForeignKey(FoodItem, on_delete=models.SET_NULL, null=True, blank=True, related_name='order_lines')
+    name = models.CharField(max_length=100)
+    quantity = models.PositiveIntegerField()
+    unit_price = models.DecimalField(max_digits=8, decimal_places=2)
+    is_offer_item = models.BooleanField(default=False)
+    line_total = models.DecimalField(max_digits=10, decimal_places=2)
+    created_at = models.DateTimeField()  # Copied from the order so reports filter on one table
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['food_item', 'created_at']),
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity}x {self.name} ({self.order_id})"
+
+    @classmethod
+    def build_for_order(cls, order, food_item_ids=None):
+        """Return unsaved lines for the items stored in ``order.items``.
+
+        ``food_item_ids``, when given, is the set of food items that still
+        exist; lines for anything else are kept with an empty food_item.
+        """
+        lines = []
+        for item in order.items:
+            food_item_id = item.get('food_item_id')
+            if food_item_ids is not None and food_item_id not in food_item_ids:
+                food_item_id = None
+            is_offer_item = bool(item.get('is_offer_item'))
+            unit_price = item['offer_price'] if is_offer_item and item.get('offer_price') else item['price']
+            lines.append(cls(
+                order=order,
+                food_item_id=food_item_id,
+                name=item['name'][:100],
+                quantity=item['quantity'],
+                unit_price=Decimal(str(unit_price)),
+                is_offer_item=is_offer_item,
+                line_total=Decimal(str(item['total_price'])),
+                created_at=order.created_at,
+            ))
+        return lines
+
+class OrderStatusEvent(models.Model):
+    """Append-only log of order status changes."""
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='status_events')
+    from_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    to_status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    source = models.CharField(max_length=50, blank=True, help_text="What made the change, e.g. 'admin'")
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(fields=['order', 'created_at']),
+            models.Index(fields=['to_status', 'created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.order_id}: {self.from_status} -> {self.to_status}"
+
+class StageTiming(models.Model):
+    """How long orders stay in one status, per item category.
+
+    ``sketch`` holds streaming quantile estimators (see cloud_kitchen/eta.py)
+    that are updated with each status change, so delivery estimates never
+    scan order history. ``python manage.py rebuild_stage_timings``
+    recalibrates every row from the status event log.
+    """
+    category_slug = models.CharField(max_length=50)
+    stage = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    sample_count = models.PositiveIntegerField(default=0)
+    sketch = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['category_slug', 'stage']
+
+    def __str__(self):
+        return f"{self.category_slug} / {self.stage} ({self.sample_count} samples)"
+
+class SalesRollup(models.Model):
+    """Order totals for one hour or one day (see cloud_kitchen/sales.py)."""
+    PERIOD_CHOICES = [
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    ]
+
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    period_start = models.DateTimeField()
+    order_count = models.IntegerField(default=0)
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    delivery_fee = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    tax = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ['period', 'period_start']
+        ordering = ['period', 'period_start']
+
+    def __str__(self):
+        return f"{self.get_period_display()} from {self.period_start}: {self.order_count} orders"
+
+    def get_average_basket(self):
+        if not self.order_count:
+            return Decimal('0.00')
+        return (self.revenue / self.order_count).quantize(Decimal('0.01'))
+
+class ItemSalesRollup(models.Model):
+    """Units and revenue of one food item for one hour or one day."""
+    period = models.CharField(max_length=10, choices=SalesRollup.PERIOD_CHOICES)
+    period_start = models.DateTimeField()
+    food_item = models.ForeignKey(FoodItem, on_delete=models.SET_NULL, null=True, blank=True, related_name='sales_rollups')
+    name = models.CharField(max_length=100)
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ['period', 'period_start', 'food_item']
+
+    def __str__(self):
+        return f"{self.name}, {self.get_period_display()} from {self.period_start}: {self.units} units"
+
+class OrderSequence(models.Model):
+    """Per-day counter behind order numbers."""
+    day = models.DateField(unique=True)
+    last_value = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.day}: {self.last_value}"
+
+    @classmethod
+    def next_value(cls, day):
+        """Atomically increment the counter for ``day`` and return the new value.
+
+        The counter row is locked only for this short transaction; callers
+        should allocate a number before opening the transaction that writes
+        the order so checkouts do not queue behind each other.
+        """
+        counter = cls.objects.filter(day=day)
+        with transaction.atomic():
+            if counter.update(last_value=F('last_value') + 1):
+                return counter.values_list('last_value', flat=True).get()
+            try:
+                with transaction.atomic():
+                    cls.objects.create(day=day, last_value=1)
+            except IntegrityError:
+                # Another worker opened the day first; increment its row instead
+                return cls.next_value(day)
+            return 1
+
 class ContactMessage(models.Model):
     user = models.ForeignKey('User', on_delete=models.CASCADE, null=True, blank=True)
     name = models.CharField(max_length=100)
@@ -191,3 +661,70 @@ class Review(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+
+class ReviewStats(models.Model):
+    """Running totals over all reviews, kept in a single row (pk=1).
+
+    Updated with F() expressions whenever a review is added, removed or
+    re-rated, so the rating summary is one primary-key read however many
+    reviews exist. ``updated_at`` changes with every review save or delete
+    and versions the review feed. ``python manage.py rebuild_review_stats``
+    recomputes it.
+    """
+    review_count = models.PositiveIntegerField(default=0)
+    star_total = models.PositiveIntegerField(default=0)
+    star_1 = models.PositiveIntegerField(default=0)
+    star_2 = models.PositiveIntegerField(default=0)
+    star_3 = models.PositiveIntegerField(default=0)
+    star_4 = models.PositiveIntegerField(default=0)
+    star_5 = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Review stats"
+
+    def __str__(self):
+        return f"{self.review_count} reviews, average {self.get_average()}"
+
+    def get_average(self):
+        if not self.review_count:
+            return 0
+        return round(self.star_total / self.review_count, 1)
+
+    def get_distribution(self):
+        """Star histogram from 5 down to 1, with each bucket's share in percent."""
+        distribution = []
+        for stars in range(5, 0, -1):
+            count = getattr(self, f'star_{stars}')
+            percent = round(count * 100 / self.review_count) if self.review_count else 0
+            distribution.append({'stars': stars, 'count': count, 'percent': percent})
+        return distribution
+
+    @classmethod
+    def get_current(cls):
+        return cls.objects.filter(pk=1).first() or cls(pk=1)
+
+    @classmethod
+    def touch(cls):
+        """Mark the reviews as changed (the review feed's version) without changing totals."""
+        now = timezone.now()
+        if not cls.objects.filter(pk=1).update(updated_at=now):
+            cls.objects.get_or_create(pk=1)
+
+    @classmethod
+    def apply_change(cls, added=None, removed=None):
+        """Count a review with ``added`` stars and/or uncount one with ``removed`` stars."""
+        deltas = {}
+        for stars, sign in ((added, 1), (removed, -1)):
+            if stars is None:
+                continue
+            for field, amount in (('review_count', 1), ('star_total', stars), (f'star_{stars}', 1)):
+                deltas[field] = deltas.get(field, 0) + sign * amount
+        updates = {field: F(field) + delta for field, delta in deltas.items() if delta}
+        if not updates:
+            return
+        updates['updated_at'] = timezone.now()
+        with transaction.atomic():
+            if not cls.objects.filter(pk=1).update(**updates):
+                cls.objects.get_or_create(pk=1)
+                cls.objects.filter(pk=1).update(**updates)
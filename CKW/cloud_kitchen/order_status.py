@@ -0,0 +1,76 @@
+"""
+Order status changes.
+
+Every change goes through bulk_transition(), which checks it against the
+order state machine (Order.allowed_transitions), applies it with one
+UPDATE for any number of orders, records an OrderStatusEvent per order
+with bulk_create, feeds the time spent in the old status to the delivery
+estimates, takes cancelled orders out of the sales rollups, and tells
+tracking pages and the kitchen queue once the transaction commits.
+"""
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from .eta import record_stage_times, stage_samples
+from .events import publish_order_updates
+from .kitchen import get_food_item_categories, update_kitchen_queue
+from .models import Order, OrderStatusEvent
+from .sales import remove_order_sales
+
+
+class InvalidTransition(ValueError):
+    pass
+
+
+def bulk_transition(orders, to_status, source=''):
+    """Move every order in the ``orders`` queryset that may go to ``to_status``.
+
+    Orders whose current status does not allow the change are left alone.
+    Returns the ids of the orders that changed.
+    """
+    if to_status not in dict(Order.STATUS_CHOICES):
+        raise InvalidTransition(f"Unknown status '{to_status}'")
+
+    now = timezone.now()
+    with transaction.atomic():
+        eligible = orders.filter(status__in=Order.statuses_allowing(to_status)).order_by()
+        last_change = OrderStatusEvent.objects.filter(order=OuterRef('pk')).order_by('-created_at', '-id')
+        # Lock the rows so the status each event records is the one replaced
+        rows = eligible.select_for_update().annotate(
+            entered_at=Coalesce(Subquery(last_change.values('created_at')[:1]), 'created_at')
+        ).values_list('id', 'status', 'entered_at')
+        previous = {order_id: (status, entered_at) for order_id, status, entered_at in rows}
+        if not previous:
+            return []
+        Order.objects.filter(id__in=previous).update(status=to_status, updated_at=now)
+        OrderStatusEvent.objects.bulk_create([
+            OrderStatusEvent(order_id=order_id, from_status=from_status, to_status=to_status,
+                             source=source, created_at=now)
+            for order_id, (from_status, _) in previous.items()
+        ])
+        changed = list(Order.objects.filter(id__in=previous))
+        categories = get_food_item_categories()
+        samples = []
+        for order in changed:
+            from_status, entered_at = previous[order.id]
+            samples += stage_samples(order, from_status, to_status, entered_at, now, categories)
+        record_stage_times(samples)
+        if to_status == 'cancelled':
+            remove_order_sales(changed)
+        publish_order_updates(changed)
+        update_kitchen_queue(changed)
+    return list(previous)
+
+
+def transition_order(order, to_status, source=''):
+    """Move a single order to ``to_status``; raises InvalidTransition if it may not."""
+    if not order.can_transition_to(to_status):
+        raise InvalidTransition(
+            f"Order {order.order_number} cannot go from "
+            f"{order.get_status_display()} to {dict(Order.STATUS_CHOICES).get(to_status, to_status)}."
+        )
+    if not bulk_transition(Order.objects.filter(pk=order.pk, status=order.status), to_status, source):
+        raise InvalidTransition(f"Order {order.order_number} was changed by someone else; reload and try again.")
+    order.status = to_status
+    order._published_status = to_status
@@ -0,0 +1,38 @@
+"""
+Change tracking for the review feed polled by the reviews page.
+
+The feed version is the ReviewStats row's ``updated_at``, which review
+signals touch whenever a review is saved or deleted, in the same
+transaction. Every worker reads the same row, so get_reviews derives its
+ETag and Last-Modified headers from it and answers a poll with nothing new
+with 304 Not Modified after a single primary-key read.
+"""
+from datetime import datetime, timezone
+
+from .models import ReviewStats
+
+
+def get_review_feed_version(request=None):
+    """Time of the last review change in nanoseconds (0 before the first review)."""
+    version = getattr(request, '_review_feed_version', None)
+    if version is None:
+        changed_at = ReviewStats.objects.filter(pk=1).values_list('updated_at', flat=True).first()
+        version = int(changed_at.timestamp()) * 10 ** 9 + changed_at.microsecond * 1000 if changed_at else 0
+        if request is not None:
+            # ETag and Last-Modified are computed for the same request
+            request._review_feed_version = version
+    return version
+
+
+def get_since_cursor(request):
+    """The ``since`` review id from the query string, or 0 for the full feed."""
+    since = request.GET.get('since', '')
+    return int(since) if since.isdigit() else 0
+
+
+def review_feed_etag(request, *args, **kwargs):
+    return f'reviews-{get_review_feed_version(request)}-{get_since_cursor(request)}'
+
+
+def review_feed_last_modified(request, *args, **kwargs):
+    return datetime.fromtimestamp(get_review_feed_version(request) / 1e9, tz=timezone.utc)
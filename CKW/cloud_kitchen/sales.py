@@ -0,0 +1,150 @@
+"""
+Sales rollups.
+
+Checkout adds every order to hourly and daily totals (SalesRollup) and
+per-item units (ItemSalesRollup) in the transaction that writes the order;
+cancelling or deleting an order takes it out again. The admin sales dashboard reads
+only these rows, so it costs the same however long the order history is.
+``python manage.py rebuild_sales_rollups`` recomputes them from the orders.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max, Sum
+from django.utils import timezone
+from .models import ItemSalesRollup, OrderLine, SalesRollup
+
+PERIODS = ('hour', 'day')
+TOTAL_FIELDS = ('subtotal', 'delivery_fee', 'tax', 'revenue')
+
+
+def period_start(moment, period):
+    """Start of the local hour or day containing ``moment``."""
+    start = timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+    if period == 'day':
+        start = start.replace(hour=0)
+    return start
+
+
+def collect_sales(orders, totals, items, sign=1, food_item_ids=None):
+    """Add ``orders`` (times ``sign``) to the ``totals`` and ``items`` deltas.
+
+    ``totals`` is keyed by (period, start) and ``items`` by (period, start,
+    food item id); lines of deleted food items are left out.
+    """
+    for order in orders:
+        lines = [
+            line for line in OrderLine.build_for_order(order, food_item_ids)
+            if line.food_item_id is not None
+        ]
+        for period in PERIODS:
+            start = period_start(order.created_at, period)
+            row = totals.setdefault((period, start), dict.fromkeys(TOTAL_FIELDS, Decimal('0.00')) | {'order_count': 0})
+            row['order_count'] += sign
+            row['subtotal'] += sign * order.subtotal
+            row['delivery_fee'] += sign * order.delivery_fee
+            row['tax'] += sign * order.tax
+            row['revenue'] += sign * order.total
+            for line in lines:
+                item = items.setdefault((period, start, line.food_item_id), {
+                    'units': 0, 'revenue': Decimal('0.00'), 'name': line.name,
+                })
+                item['units'] += sign * line.quantity
+                item['revenue'] += sign * line.line_total
+
+
+def _apply(model, key, delta, defaults, create):
+    rows = model.objects.filter(**key)
+    changes = {field: F(field) + value for field, value in delta.items()}
+    if rows.update(**changes) or not create:
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **delta, **defaults)
+    except IntegrityError:
+        # Another checkout opened the period first
+        rows.update(**changes)
+
+
+def apply_sales(totals, items, create=True):
+    """Add collected deltas to the stored rollups with F() updates.
+
+    Rows are visited in key order so concurrent checkouts lock them in the
+    same order. Missing rows are created only when ``create`` is set.
+    Call inside the transaction that writes the orders.
+    """
+    for (period, start), delta in sorted(totals.items()):
+        _apply(SalesRollup, {'period': period, 'period_start': start}, delta, {}, create)
+    for (period, start, food_item_id), delta in sorted(items.items(), key=lambda entry: entry[0]):
+        delta = dict(delta)
+        name = delta.pop('name')
+        _apply(ItemSalesRollup, {'period': period, 'period_start': start, 'food_item_id': food_item_id},
+               delta, {'name': name}, create)
+
+
+def add_order_sales(orders):
+    totals, items = {}, {}
+    collect_sales(orders, totals, items)
+    apply_sales(totals, items)
+
+
+def remove_order_sales(orders):
+    totals, items = {}, {}
+    collect_sales(orders, totals, items, sign=-1)
+    # Rows of food items deleted since are gone; there is nothing to take back
+    apply_sales(totals, items, create=False)
+
+
+def _series(period, first, count, step):
+    rows = {
+        row.period_start: row
+        for row in SalesRollup.objects.filter(period=period, period_start__gte=first,
+                                              period_start__lt=first + step * count)
+    }
+    series = []
+    for index in range(count):
+        start = first + step * index
+        series.append(rows.get(start) or SalesRollup(period=period, period_start=start))
+    peak = max((row.revenue for row in series), default=0)
+    return [{
+        'start': row.period_start,
+        'order_count': row.order_count,
+        'revenue': row.revenue,
+        'average_basket': row.get_average_basket(),
+        'percent': round(row.revenue * 100 / peak) if peak else 0,
+    } for row in series]
+
+
+def get_dashboard(days=30, now=None):
+    """Everything the sales dashboard shows, read from the rollups alone."""
+    now = now or timezone.now()
+    first_day = period_start(now, 'day') - timedelta(days=days - 1)
+    first_hour = period_start(now, 'hour') - timedelta(hours=23)
+
+    daily = _series('day', first_day, days, timedelta(days=1))
+    hourly = _series('hour', first_hour, 24, timedelta(hours=1))
+    summary = SalesRollup(
+        order_count=sum(point['order_count'] for point in daily),
+        revenue=sum((point['revenue'] for point in daily), Decimal('0.00')),
+    )
+    today = daily[-1]
+    top_items = list(
+        ItemSalesRollup.objects.filter(period='day', period_start__gte=first_day)
+        .values('food_item_id')
+        .annotate(item_name=Max('name'), total_units=Sum('units'), total_revenue=Sum('revenue'))
+        .filter(total_units__gt=0)
+        .order_by('-total_units', '-total_revenue')[:10]
+    )
+    return {
+        'days': days,
+        'summary': {
+            'order_count': summary.order_count,
+            'revenue': summary.revenue,
+            'average_basket': summary.get_average_basket(),
+        },
+        'today': today,
+        'daily': daily,
+        'hourly': hourly,
+        'top_items': top_items,
+    }
@@ -0,0 +1,205 @@
+"""
+In-memory search over the menu.
+
+Each process keeps an inverted index from terms in food item names,
+descriptions and category names to the items containing them. Queries
+are answered from that index with prefix matching ("bir" finds biryani),
+one- or two-letter typo tolerance for longer words, and ranking that
+favours name matches over category and description matches.
+
+The index is tagged with the catalog version it was built for and is
+rebuilt from one query when another process changes the catalog. Food
+item changes made in this process are applied incrementally.
+"""
+import bisect
+import re
+import threading
+
+from django.db import transaction
+from django.urls import NoReverseMatch, reverse
+from .catalog import get_catalog_version
+from .models import FoodItem
+
+TERM_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Weight of a term by the field it came from
+FIELD_WEIGHTS = (('name', 3.0), ('category_name', 2.0), ('description', 1.0))
+
+# How much an exact, prefix or typo-tolerant term match counts
+EXACT_MATCH = 1.0
+PREFIX_MATCH = 0.7
+TYPO_MATCH = 0.5
+
+_lock = threading.Lock()
+_index = None
+
+
+def tokenize(text):
+    return TERM_PATTERN.findall(text.lower())
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance between ``a`` and ``b``, or ``limit + 1`` once it exceeds ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class SearchIndex:
+    def __init__(self, version=None):
+        self.version = version
+        self.documents = {}   # item id -> result dict
+        self.postings = {}    # term -> {item id: weight}
+        self.terms = []       # sorted vocabulary, for prefix lookups
+        self._item_terms = {}
+
+    def add(self, document):
+        self.remove(document['id'])
+        weights = {}
+        for field, field_weight in FIELD_WEIGHTS:
+            for term in tokenize(document[field]):
+                weights[term] = max(weights.get(term, 0), field_weight)
+        for term, weight in weights.items():
+            if term not in self.postings:
+                self.postings[term] = {}
+                bisect.insort(self.terms, term)
+            self.postings[term][document['id']] = weight
+        self.documents[document['id']] = document
+        self._item_terms[document['id']] = list(weights)
+
+    def remove(self, item_id):
+        for term in self._item_terms.pop(item_id, ()):
+            posting = self.postings[term]
+            posting.pop(item_id, None)
+            if not posting:
+                del self.postings[term]
+                del self.terms[bisect.bisect_left(self.terms, term)]
+        self.documents.pop(item_id, None)
+
+    def expand(self, token):
+        """Vocabulary terms matching ``token``, with the strength of each match."""
+        matches = {}
+        start = bisect.bisect_left(self.terms, token)
+        for term in self.terms[start:]:
+            if not term.startswith(token):
+                break
+            matches[term] = EXACT_MATCH if term == token else PREFIX_MATCH
+        if not matches and len(token) >= 4:
+            limit = 1 if len(token) < 8 else 2
+            for term in self.terms:
+                # Compare against the term, and its start for words typed half-way
+                if min(edit_distance(token, term, limit), edit_distance(token, term[:len(token)], limit)) <= limit:
+                    matches[term] = TYPO_MATCH
+        return matches
+
+    def search(self, query, limit=20):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        scores = None
+        for token in tokens:
+            token_scores = {}
+            for term, strength in self.expand(token).items():
+                for item_id, weight in self.postings[term].items():
+                    token_scores[item_id] = max(token_scores.get(item_id, 0), strength * weight)
+            # Every query word has to match somewhere
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {item_id: score + token_scores[item_id] for item_id, score in scores.items() if item_id in token_scores}
+            if not scores:
+                return []
+        ranked = sorted(scores.items(), key=lambda entry: (-entry[1], self.documents[entry[0]]['name']))
+        return [dict(self.documents[item_id], score=round(score, 2)) for item_id, score in ranked[:limit]]
+
+
+def build_document(food_item):
+    category = food_item.category
+    try:
+        category_url = reverse(category.slug)
+    except NoReverseMatch:
+        category_url = None
+    return {
+        'id': food_item.id,
+        'name': food_item.name,
+        'description': food_item.description,
+        'price': str(food_item.price),
+        'icon_class': food_item.icon_class,
+        'category': category.slug,
+        'category_name': category.display_name,
+        'category_url': category_url,
+    }
+
+
+def searchable_items():
+    """Food items the menu shows: available, in an active category."""
+    return FoodItem.objects.filter(is_available=True, category__is_active=True).select_related('category')
+
+
+def build_index(version):
+    index = SearchIndex(version)
+    for food_item in searchable_items():
+        index.add(build_document(food_item))
+    return index
+
+
+def get_search_index():
+    global _index
+    version = get_catalog_version()
+    index = _index
+    if index is None or index.version != version:
+        with _lock:
+            if _index is None or _index.version != version:
+                _index = build_index(version)
+            index = _index
+    return index
+
+
+def search_menu(query, limit=20):
+    """Ranked food items matching ``query``, as dicts ready for JSON."""
+    index = get_search_index()
+    with _lock:
+        return index.search(query, limit)
+
+
+def schedule_item_update(*item_ids):
+    """Re-index food items in this process once the current transaction commits.
+
+    Runs after the catalog version bump registered by the catalog signal,
+    so an index that was current before the change is carried forward to
+    the new version instead of being rebuilt.
+    """
+    index = _index
+    was_current = index is not None and index.version == get_catalog_version()
+    transaction.on_commit(lambda: _apply_item_update(index, item_ids, was_current))
+
+
+def schedule_category_update(category_id):
+    """Re-index every food item of a category, e.g. after it is hidden or renamed."""
+    schedule_item_update(*FoodItem.objects.filter(category_id=category_id).values_list('id', flat=True))
+
+
+def _apply_item_update(index, item_ids, was_current):
+    if index is None or index is not _index:
+        return
+    food_items = searchable_items().in_bulk(item_ids)
+    with _lock:
+        for item_id in item_ids:
+            if item_id in food_items:
+                index.add(build_document(food_items[item_id]))
+            else:
+                index.remove(item_id)
+        if was_current:
+            index.version = get_catalog_version()
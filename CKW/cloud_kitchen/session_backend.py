@@ -0,0 +1,58 @@
+"""
+Session engine tuned for the app's session-based login.
+
+Enable with SESSION_ENGINE = 'cloud_kitchen.session_backend'. It builds on
+Django's cached_db engine: sessions are read from the cache, and the
+django_session table is only consulted on a cache miss. On top of that,
+saves that would not change the stored data are skipped, and the database
+copy is written behind the cache at most once per
+SESSION_WRITE_BEHIND_INTERVAL seconds. New sessions and changes to the login
+keys are always persisted straight away, so a lost cache entry can only cost
+short-lived values such as a pending OTP.
+"""
+import copy
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+
+
+class SessionStore(CachedDBStore):
+    # Changes to these keys reach the database immediately so logins survive a cache loss
+    durable_keys = ('user_id', 'username')
+
+    @property
+    def persisted_key(self):
+        return self.cache_key + ':persisted'
+
+    def load(self):
+        data = super().load()
+        self._stored_data = copy.deepcopy(data)
+        return data
+
+    def save(self, must_create=False):
+        if must_create or self.session_key is None or not hasattr(self, '_stored_data'):
+            # New sessions, and sessions saved without being loaded, go straight through
+            self._persist(must_create)
+        else:
+            data = self._get_session()
+            if data == self._stored_data:
+                return
+            if self._must_persist(data):
+                self._persist()
+            else:
+                self._cache.set(self.cache_key, data, self.get_expiry_age())
+        self._stored_data = copy.deepcopy(self._get_session(no_load=True))
+
+    def _persist(self, must_create=False):
+        super().save(must_create)
+        self._cache.set(self.persisted_key, time.time(), self.get_expiry_age())
+
+    def _must_persist(self, data):
+        interval = getattr(settings, 'SESSION_WRITE_BEHIND_INTERVAL', 0)
+        if not interval:
+            return True
+        if any(data.get(key) != self._stored_data.get(key) for key in self.durable_keys):
+            return True
+        persisted_at = self._cache.get(self.persisted_key)
+        return persisted_at is None or time.time() - persisted_at >= interval
@@ -0,0 +1,119 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+from .catalog import bump_catalog_version
+from .events import publish_order_updates
+from .kitchen import update_kitchen_queue
+from .middleware import forget_user
+from .models import Cart, CartItem, Category, FoodItem, Offer, Order, Review, ReviewStats, User
+from .sales import remove_order_sales
+from .search import schedule_category_update, schedule_item_update
+
+
+def carts_holding(food_item):
+    return CartItem.objects.filter(food_item=food_item).values('cart')
+
+
+@receiver(post_init, sender=FoodItem)
+def remember_food_item_price(sender, instance, **kwargs):
+    instance._synced_price = instance.__dict__.get('price')
+
+
+@receiver(post_save, sender=FoodItem)
+def resync_carts_on_price_change(sender, instance, created, **kwargs):
+    # Stored cart summaries are priced at the time of the change, so carts
+    # holding this item are recomputed when its price is edited.
+    price = instance.__dict__.get('price')
+    if created or price is None or price == instance._synced_price:
+        return
+    instance._synced_price = price
+    Cart.refresh_summaries(Cart.objects.filter(pk__in=carts_holding(instance)))
+
+
+@receiver(pre_delete, sender=FoodItem)
+def remember_carts_before_delete(sender, instance, **kwargs):
+    instance._affected_cart_ids = list(carts_holding(instance).values_list('cart', flat=True))
+
+
+@receiver(post_delete, sender=FoodItem)
+def resync_carts_after_delete(sender, instance, **kwargs):
+    cart_ids = getattr(instance, '_affected_cart_ids', [])
+    if cart_ids:
+        Cart.refresh_summaries(Cart.objects.filter(pk__in=cart_ids))
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=FoodItem)
+@receiver([post_save, post_delete], sender=Offer)
+def invalidate_catalog(sender, **kwargs):
+    # Bump after commit so no request can snapshot the pre-commit rows under the new version
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver([post_save, post_delete], sender=FoodItem)
+def reindex_food_item(sender, instance, **kwargs):
+    # Connected after invalidate_catalog, so its commit hook runs after the version bump
+    schedule_item_update(instance.pk)
+
+
+@receiver(post_save, sender=Category)
+def reindex_category(sender, instance, **kwargs):
+    # Deleting a category deletes its items, which reindex themselves
+    schedule_category_update(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    forget_user(instance.id)
+
+
+@receiver(post_init, sender=Order)
+def remember_order_status(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred status field is not loaded here
+    instance._published_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Order)
+def update_kitchen_on_save(sender, instance, **kwargs):
+    update_kitchen_queue([instance])
+
+
+@receiver(pre_delete, sender=Order)
+def remove_deleted_order_sales(sender, instance, **kwargs):
+    # Cancelled orders were taken out of the rollups when they were cancelled
+    if instance.status != 'cancelled':
+        remove_order_sales([instance])
+
+
+@receiver(post_save, sender=Order)
+def publish_status_change(sender, instance, created, **kwargs):
+    status = instance.__dict__.get('status')
+    if created or status is None or status == instance._published_status:
+        return
+    instance._published_status = status
+    publish_order_updates([instance])
+
+
+@receiver([post_save, post_delete], sender=Review)
+def invalidate_review_feed(sender, **kwargs):
+    ReviewStats.touch()
+
+
+@receiver(post_init, sender=Review)
+def remember_review_stars(sender, instance, **kwargs):
+    instance._counted_stars = instance.__dict__.get('stars') if instance.pk else None
+
+
+@receiver(post_save, sender=Review)
+def count_review(sender, instance, created, **kwargs):
+    stars = instance.__dict__.get('stars')
+    if stars is None or stars == instance._counted_stars:
+        return
+    ReviewStats.apply_change(added=stars, removed=None if created else instance._counted_stars)
+    instance._counted_stars = stars
+
+
+@receiver(post_delete, sender=Review)
+def uncount_review(sender, instance, **kwargs):
+    if instance._counted_stars is not None:
+        ReviewStats.apply_change(removed=instance._counted_stars)
@@ -1,3 +1,548 @@
-from django.test import TestCase
+import io
+import json
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User as AdminUser
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+from . import catalog, kitchen, search
+from .checkout import place_order
+from .models import Cart, Category, FoodItem, ItemSalesRollup, Offer, Order, OrderLine, OrderStatusEvent, Review, ReviewStats, SalesRollup, User
+from .order_status import InvalidTransition, bulk_transition, transition_order
+from .views import get_order_page
+
+
+class CloudKitchenTestCase(TestCase):
+    """A logged-in customer and a small menu."""
+
+    def setUp(self):
+        cache.clear()
+        caches['template_fragments'].clear()
+        catalog._local_snapshots.clear()
+        self.user = User(username='asha', email='asha@example.com')
+        self.user.set_password('secret123')
+        self.user.save()
+        self.category = Category.objects.create(name='biryani', display_name='Biryani & Rice', slug='biryani')
+        self.veg = FoodItem.objects.create(
+            category=self.category, name='Veg Biryani', description='Rice', price=Decimal('100.00'), icon_class='x'
+        )
+        self.chicken = FoodItem.objects.create(
+            category=self.category, name='Chicken Biryani', description='Rice', price=Decimal('250.50'), icon_class='x'
+        )
+        self.client = Client()
+        session = self.client.session
+        session['user_id'] = self.user.id
+        session['username'] = self.user.username
+        session.save()
+
+    def get_cart(self):
+        return Cart.objects.get(user=self.user)
+
+    def create_order(self, status='pending'):
+        order = Order.objects.create(
+            user=self.user, status=status, subtotal=Decimal('100.00'), tax=Decimal('18.00'), total=Decimal('158.00'),
+            items=[{'food_item_id': self.veg.id, 'name': 'Veg Biryani', 'price': 100.0, 'quantity': 1,
+                    'total_price': 100.0, 'is_offer_item': False, 'offer_price': None}],
+        )
+        OrderLine.objects.bulk_create(OrderLine.build_for_order(order))
+        return order
+
+
+class CartBatchTests(CloudKitchenTestCase):
+    def batch(self, *operations):
+        response = self.client.post(
+            reverse('update_cart_batch'), json.dumps({'operations': list(operations)}), content_type='application/json'
+        )
+        return response.json()
+
+    def test_summary_matches_lines_after_batch(self):
+        self.client.post(reverse('add_to_cart', args=[self.veg.id]))
+        data = self.batch(
+            {'food_item_id': self.veg.id, 'delta': 2},
+            {'food_item_id': self.chicken.id, 'set_quantity': 2},
+            {'food_item_id': self.chicken.id, 'delta': -1},
+        )
+        self.assertTrue(data['success'])
+        cart = self.get_cart()
+        totals = cart.get_totals()
+        self.assertEqual((cart.item_count, cart.subtotal), (totals['item_count'], totals['subtotal']))
+        self.assertEqual(totals['item_count'], 4)
+        self.assertEqual(totals['subtotal'], Decimal('550.50'))
+        self.assertEqual(data['cart_count'], 4)
+
+        data = self.batch({'food_item_id': self.veg.id, 'remove': True})
+        self.assertIsNone(data['items'][str(self.veg.id)])
+        cart.refresh_from_db()
+        self.assertEqual((cart.item_count, cart.subtotal), (1, Decimal('250.50')))
+
+    def test_invalid_batch_changes_nothing(self):
+        self.client.post(reverse('add_to_cart', args=[self.veg.id]))
+        data = self.batch({'food_item_id': self.veg.id, 'delta': 1}, {'food_item_id': self.chicken.id})
+        self.assertFalse(data['success'])
+        cart = self.get_cart()
+        self.assertEqual(cart.item_count, 1)
+        self.assertEqual(cart.cartitem_set.get().quantity, 1)
+
+    def test_new_lines_take_the_active_offer(self):
+        Offer.objects.create(food_item=self.chicken, discount_percentage=Decimal('40'))
+        self.batch({'food_item_id': self.chicken.id, 'delta': 2})
+        line = self.get_cart().cartitem_set.get()
+        self.assertTrue(line.is_offer_item)
+        self.assertEqual(line.offer_price, Decimal('150.30'))
+        self.assertEqual(self.get_cart().subtotal, Decimal('300.60'))
+
+        # The same item added one click at a time is priced the same
+        self.batch({'food_item_id': self.chicken.id, 'remove': True})
+        self.client.post(reverse('add_to_cart', args=[self.chicken.id]))
+        self.client.post(reverse('add_to_cart', args=[self.chicken.id]))
+        self.assertEqual(self.get_cart().subtotal, Decimal('300.60'))
+
+
+class CartViewTests(CloudKitchenTestCase):
+    def assertSummaryMatchesLines(self):
+        cart = self.get_cart()
+        totals = cart.get_totals()
+        self.assertEqual((cart.item_count, cart.subtotal), (totals['item_count'], totals['subtotal']))
+
+    def test_repeated_remove_is_applied_once(self):
+        self.client.post(reverse('add_to_cart', args=[self.veg.id]))
+        self.client.post(reverse('add_to_cart', args=[self.chicken.id]))
+        self.client.post(reverse('add_to_cart', args=[self.chicken.id]))
+        line = self.get_cart().cartitem_set.get(food_item=self.chicken)
+
+        self.assertTrue(self.client.post(reverse('remove_from_cart', args=[line.id])).json()['success'])
+        self.assertFalse(self.client.post(reverse('remove_from_cart', args=[line.id])).json()['success'])
+        self.assertSummaryMatchesLines()
+        self.assertEqual(self.get_cart().item_count, 1)
+
+    def test_quantity_changes_keep_the_summary(self):
+        self.client.post(reverse('add_to_cart', args=[self.chicken.id]))
+        line = self.get_cart().cartitem_set.get()
+        url = reverse('update_cart_item', args=[line.id])
+        self.client.post(url, {'action': 'increase'})
+        data = self.client.post(url, {'action': 'increase'}).json()
+        self.assertEqual((data['quantity'], data['cart_count']), (3, 3))
+        self.client.post(url, {'action': 'decrease'})
+        self.assertSummaryMatchesLines()
+        self.assertEqual(self.get_cart().subtotal, Decimal('501.00'))
+
+
+class CartPriceChangeTests(CloudKitchenTestCase):
+    def setUp(self):
+        super().setUp()
+        self.carts = [Cart.objects.create(session_key=f'guest-{n}') for n in range(3)]
+        for cart in self.carts:
+            cart.add_item(self.veg)
+            cart.add_item(self.chicken)
+
+    def cart_queries(self, queries):
+        return [q['sql'] for q in queries if 'cloud_kitchen_cart"' in q['sql'] and q['sql'].startswith('UPDATE')]
+
+    def test_price_change_recomputes_carts_in_one_update(self):
+        self.veg.price = Decimal('120.00')
+        with CaptureQueriesContext(connection) as queries:
+            self.veg.save()
+        self.assertEqual(len(self.cart_queries(queries)), 1)
+        for cart in Cart.objects.filter(pk__in=[cart.pk for cart in self.carts]):
+            self.assertEqual((cart.item_count, cart.subtotal), (2, Decimal('370.50')))
+
+    def test_other_edits_leave_carts_alone(self):
+        self.veg.description = 'Fragrant rice'
+        with CaptureQueriesContext(connection) as queries:
+            FoodItem.objects.get(pk=self.veg.pk).save()
+            self.veg.save()
+        self.assertEqual(self.cart_queries(queries), [])
+
+    def test_deleting_an_item_recomputes_carts(self):
+        self.chicken.delete()
+        for cart in Cart.objects.filter(pk__in=[cart.pk for cart in self.carts]):
+            self.assertEqual((cart.item_count, cart.subtotal), (1, Decimal('100.00')))
+
+
+class ReviewFeedTests(CloudKitchenTestCase):
+    def test_rebuild_review_stats_counts_every_review(self):
+        for stars in (5, 4, 4, 1, 5):
+            Review.objects.create(user=self.user, message='Food', stars=stars)
+        ReviewStats.objects.filter(pk=1).update(review_count=0, star_total=0, star_4=0)
+
+        call_command('rebuild_review_stats', chunk_size=2, stdout=io.StringIO())
+        stats = ReviewStats.objects.get(pk=1)
+        self.assertEqual((stats.review_count, stats.star_total), (5, 19))
+        self.assertEqual([getattr(stats, f'star_{n}') for n in range(1, 6)], [1, 0, 0, 2, 2])
+
+    def test_unchanged_poll_is_not_modified(self):
+        Review.objects.create(user=self.user, message='Great food', stars=5)
+        first = self.client.get(reverse('get_reviews'))
+        self.assertEqual(first.status_code, 200)
+        poll = self.client.get(reverse('get_reviews'), {'since': first.json()['cursor']})
+        self.assertEqual(poll.json()['reviews'], [])
+
+        with CaptureQueriesContext(connection) as queries:
+            again = self.client.get(reverse('get_reviews'), {'since': first.json()['cursor']}, HTTP_IF_NONE_MATCH=poll['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertFalse([query for query in queries if 'cloud_kitchen_review"' in query['sql']])
+
+    def test_any_review_change_changes_the_etag(self):
+        review = Review.objects.create(user=self.user, message='Great food', stars=5)
+        etag = self.client.get(reverse('get_reviews'))['ETag']
+
+        # Edits that leave the star totals alone still change the feed
+        review.message = 'Great food, fast delivery'
+        review.save()
+        response = self.client.get(reverse('get_reviews'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['reviews'][0]['message'], 'Great food, fast delivery')
+
+        etag = response['ETag']
+        review.delete()
+        response = self.client.get(reverse('get_reviews'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['reviews'], [])
+
+    def test_version_does_not_depend_on_the_cache(self):
+        Review.objects.create(user=self.user, message='Great food', stars=5)
+        etag = self.client.get(reverse('get_reviews'))['ETag']
+        # Another worker's cache knows nothing of this process's entries
+        cache.clear()
+        response = self.client.get(reverse('get_reviews'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class SearchTests(CloudKitchenTestCase):
+    def setUp(self):
+        super().setUp()
+        search._index = None
+
+    def search(self, query):
+        return [result['name'] for result in self.client.get(reverse('search'), {'q': query}).json()['results']]
+
+    def test_items_of_inactive_categories_are_not_found(self):
+        drinks = Category.objects.create(name='drinks', display_name='Drinks', slug='drinks', is_active=False)
+        FoodItem.objects.create(category=drinks, name='Mango Lassi', description='Yogurt', price=Decimal('60.00'), icon_class='x')
+        self.assertEqual(self.search('lassi'), [])
+        self.assertEqual(self.search('biryani'), ['Chicken Biryani', 'Veg Biryani'])
+
+    def test_category_changes_reindex_its_items(self):
+        self.assertEqual(len(self.search('biryani')), 2)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.is_active = False
+            self.category.save()
+        self.assertEqual(self.search('biryani'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.is_active = True
+            self.category.save()
+        self.assertEqual(len(self.search('biryani')), 2)
+
+
+class OrderStatusTests(CloudKitchenTestCase):
+    def test_allowed_transitions(self):
+        self.assertEqual(Order.allowed_transitions('pending'), ('confirmed', 'preparing', 'ready', 'delivered', 'cancelled'))
+        self.assertEqual(Order.allowed_transitions('ready'), ('delivered', 'cancelled'))
+        self.assertEqual(Order.allowed_transitions('delivered'), ())
+        self.assertEqual(Order.allowed_transitions('cancelled'), ())
+        self.assertEqual(Order.statuses_allowing('pending'), [])
+
+    def test_bulk_transition_moves_eligible_orders_and_logs_them(self):
+        orders = [self.create_order() for _ in range(3)]
+        delivered = self.create_order('delivered')
+        changed = bulk_transition(Order.objects.all(), 'preparing', source='test')
+
+        self.assertEqual(sorted(changed), sorted(order.id for order in orders))
+        self.assertEqual(Order.objects.filter(status='preparing').count(), 3)
+        self.assertEqual(Order.objects.get(pk=delivered.pk).status, 'delivered')
+        events = OrderStatusEvent.objects.all()
+        self.assertEqual(len(events), 3)
+        self.assertTrue(all((e.from_status, e.to_status, e.source) == ('pending', 'preparing', 'test') for e in events))
+        self.assertEqual(bulk_transition(Order.objects.all(), 'confirmed'), [])
+
+    def test_transition_order_rejects_moves_backwards_and_out_of_final_states(self):
+        order = self.create_order('ready')
+        with self.assertRaises(InvalidTransition):
+            transition_order(order, 'preparing')
+        transition_order(order, 'delivered')
+        self.assertEqual(Order.objects.get(pk=order.pk).status, 'delivered')
+        with self.assertRaises(InvalidTransition):
+            transition_order(order, 'cancelled')
+        self.assertEqual(OrderStatusEvent.objects.count(), 1)
+
+    def test_admin_status_edits_follow_the_state_machine(self):
+        admin = AdminUser.objects.create_superuser('admin', 'admin@example.com', 'secret123')
+        self.client.force_login(admin)
+        order = self.create_order('delivered')
+        changelist = reverse('admin:cloud_kitchen_order_changelist')
+        form = {
+            'form-TOTAL_FORMS': '1', 'form-INITIAL_FORMS': '1',
+            'form-0-id': str(order.pk), 'form-0-status': 'pending', '_save': 'Save',
+        }
+        response = self.client.post(changelist, form)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Delivered orders cannot be moved to Pending')
+        self.assertEqual(Order.objects.get(pk=order.pk).status, 'delivered')
+
+        order = self.create_order('pending')
+        form['form-0-id'] = str(order.pk)
+        form['form-0-status'] = 'confirmed'
+        self.assertEqual(self.client.post(changelist, form).status_code, 302)
+        self.assertEqual(Order.objects.get(pk=order.pk).status, 'confirmed')
+        self.assertEqual(OrderStatusEvent.objects.get(order=order).source, 'admin')
+
+
+    def test_admin_list_edit_ignores_rows_that_moved_untouched(self):
+        admin = AdminUser.objects.create_superuser('admin', 'admin@example.com', 'secret123')
+        self.client.force_login(admin)
+        edited, untouched = self.create_order('pending'), self.create_order('pending')
+        changelist = reverse('admin:cloud_kitchen_order_changelist')
+        page = self.client.get(changelist)
+        self.assertContains(page, 'name="initial-form-0-status"')
+
+        # The kitchen moves one order on after the page was loaded
+        transition_order(Order.objects.get(pk=untouched.pk), 'delivered')
+        forms = page.context['cl'].formset.forms
+        data = {'form-TOTAL_FORMS': str(len(forms)), 'form-INITIAL_FORMS': str(len(forms)), '_save': 'Save'}
+        for index, form in enumerate(forms):
+            data[f'form-{index}-id'] = str(form.instance.pk)
+            data[f'initial-form-{index}-status'] = 'pending'
+            data[f'form-{index}-status'] = 'confirmed' if form.instance.pk == edited.pk else 'pending'
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(changelist, data)
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Order.objects.get(pk=edited.pk).status, 'confirmed')
+        self.assertEqual(Order.objects.get(pk=untouched.pk).status, 'delivered')
+        status_reads = [q for q in queries if q['sql'].startswith('SELECT "cloud_kitchen_order"."status"')]
+        self.assertEqual(len(status_reads), 1)
+
+class OrderTrackingTests(CloudKitchenTestCase):
+    def test_order_page_estimates_open_orders_without_loading_items(self):
+        delivered = self.create_order('delivered')
+        pending = self.create_order('pending')
+        page, next_cursor = get_order_page(self.user)
+
+        self.assertEqual([order.id for order in page], [pending.id, delivered.id])
+        self.assertIsNone(next_cursor)
+        self.assertTrue(all('items' in order.get_deferred_fields() for order in page))
+        self.assertIsNone(page[1].eta)
+        # Pending 3 + confirmed 5 + biryani preparing 25 + ready 20 minutes
+        minutes = (page[0].eta['earliest'] - pending.created_at).total_seconds() / 60
+        self.assertAlmostEqual(minutes, 53, delta=1)
+
+    def test_cursors_walk_the_whole_history_once(self):
+        orders = [self.create_order('delivered') for _ in range(23)]
+        # Orders placed in the same instant are told apart by id
+        Order.objects.filter(pk__in=[order.pk for order in orders[5:15]]).update(created_at=orders[5].created_at)
+
+        seen, cursor, pages = [], None, 0
+        while True:
+            data = self.client.get(reverse('track_orders'), {'cursor': cursor} if cursor else {}).json()
+            seen += [order['id'] for order in data['orders']]
+            pages += 1
+            cursor = data['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(pages, 3)
+        expected = Order.objects.order_by('-created_at', '-id').values_list('id', flat=True)
+        self.assertEqual(seen, list(expected))
+
+    def test_malformed_cursor_is_rejected(self):
+        response = self.client.get(reverse('track_orders'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['message'], 'Invalid cursor')
+
+
+class SalesRollupTests(CloudKitchenTestCase):
+    def checkout(self):
+        self.client.post(reverse('add_to_cart', args=[self.veg.id]))
+        self.client.post(reverse('add_to_cart', args=[self.veg.id]))
+        order, created = place_order(self.user, self.get_cart())
+        self.assertTrue(created)
+        return order
+
+    def day_totals(self):
+        row = SalesRollup.objects.filter(period='day').first()
+        item = ItemSalesRollup.objects.filter(period='day', food_item=self.veg).first()
+        return (row.order_count, row.revenue), (item.units, item.revenue)
+
+    def test_checkout_adds_order_to_rollups(self):
+        first = self.checkout()
+        second = self.checkout()
+        self.assertEqual(SalesRollup.objects.count(), 2)  # One hour and one day row
+        self.assertEqual(self.day_totals(), ((2, first.total + second.total), (4, Decimal('400.00'))))
+
+    def test_cancelling_and_deleting_orders_take_them_out(self):
+        cancelled = self.checkout()
+        deleted = self.checkout()
+        kept = self.checkout()
+        transition_order(cancelled, 'cancelled')
+        self.assertEqual(self.day_totals(), ((2, deleted.total + kept.total), (4, Decimal('400.00'))))
+
+        Order.objects.filter(pk__in=[cancelled.pk, deleted.pk]).delete()
+        self.assertEqual(self.day_totals(), ((1, kept.total), (2, Decimal('200.00'))))
+
+        self.user.delete()
+        self.assertEqual(self.day_totals(), ((0, Decimal('0.00')), (0, Decimal('0.00'))))
+
+
+class CheckoutTests(CloudKitchenTestCase):
+    def pay(self, token):
+        return self.client.post(reverse('order_confirmation'), {'checkout_token': token}).json()
+
+    def test_retried_checkout_returns_the_same_order(self):
+        self.client.post(reverse('add_to_cart', args=[self.veg.id]))
+        first = self.pay('token-1')
+        self.assertTrue(first['success'])
+        self.assertEqual(self.get_cart().cartitem_set.count(), 0)
+
+        # A retry is answered with the order even though the cart is empty now,
+        # and does not touch anything added to the cart since
+        self.client.post(reverse('add_to_cart', args=[self.chicken.id]))
+        self.assertEqual(self.pay('token-1'), first)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(SalesRollup.objects.get(period='day').order_count, 1)
+        self.assertEqual(self.get_cart().cartitem_set.count(), 1)
+
+        second = self.pay('token-2')
+        self.assertNotEqual(second['order_id'], first['order_id'])
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(self.pay('token-3'), {'success': False, 'message': 'Your cart is empty'})
+
+    def test_tokens_are_scoped_to_the_customer(self):
+        self.client.post(reverse('add_to_cart', args=[self.veg.id]))
+        first = self.pay('shared-token')
+
+        other = User.objects.create(username='ravi', email='ravi@example.com')
+        session = self.client.session
+        session['user_id'], session['username'] = other.id, other.username
+        session.save()
+        self.client.post(reverse('add_to_cart', args=[self.chicken.id]))
+        second = self.pay('shared-token')
+        self.assertTrue(second['success'])
+        self.assertNotEqual(second['order_id'], first['order_id'])
+        self.assertEqual(Order.objects.get(pk=second['order_id']).user, other)
+
+    def test_overlong_token_is_rejected(self):
+        self.client.post(reverse('add_to_cart', args=[self.veg.id]))
+        response = self.client.post(reverse('order_confirmation'), {'checkout_token': 'x' * 65})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+
+class OfferScheduleTests(CloudKitchenTestCase):
+    def at(self, day, hour, minute=0):
+        # October 2026: the 5th is a Monday
+        return datetime(2026, 10, day, hour, minute, tzinfo=dt_timezone.utc)
+
+    def test_window_includes_its_start_and_excludes_its_end(self):
+        offer = Offer(food_item=self.veg, starts_at=self.at(5, 12), ends_at=self.at(6, 12))
+        self.assertFalse(offer.is_live(self.at(5, 11, 59)))
+        self.assertTrue(offer.is_live(self.at(5, 12)))
+        self.assertFalse(offer.is_live(self.at(6, 12)))
+        self.assertEqual(offer.next_change(self.at(5, 1)), self.at(5, 12))
+        self.assertEqual(offer.next_change(self.at(5, 12)), self.at(6, 12))
+        self.assertIsNone(offer.next_change(self.at(6, 12)))
+        offer.is_active = False
+        self.assertFalse(offer.is_live(self.at(5, 13)))
+
+    def test_overnight_daily_slot_on_weekdays(self):
+        # 22:00-02:00 starting Monday to Friday
+        offer = Offer(food_item=self.veg, daily_start=time(22), daily_end=time(2), weekdays='01234')
+        self.assertTrue(offer.is_live(self.at(5, 22)))
+        self.assertTrue(offer.is_live(self.at(6, 1, 59)))
+        self.assertFalse(offer.is_live(self.at(6, 2)))
+        self.assertFalse(offer.is_live(self.at(6, 21, 59)))
+        # Friday night's slot runs into Saturday; none starts on Saturday
+        self.assertTrue(offer.is_live(self.at(10, 1)))
+        self.assertFalse(offer.is_live(self.at(10, 23)))
+        self.assertEqual(offer.next_change(self.at(6, 1)), self.at(6, 2))
+        self.assertEqual(offer.next_change(self.at(10, 3)), self.at(12, 22))
+
+    def test_offer_index_follows_the_schedule(self):
+        now = timezone.now()
+        Offer.objects.create(food_item=self.veg, discount_percentage=Decimal('50.00'), starts_at=now + timedelta(hours=1))
+        Offer.objects.create(food_item=self.chicken, ends_at=now - timedelta(minutes=1))
+        self.assertEqual(catalog.get_offer_index(), {})
+
+        later = now + timedelta(hours=1)
+        with mock.patch('django.utils.timezone.now', return_value=later), \
+                mock.patch('cloud_kitchen.catalog.time.time', return_value=later.timestamp()):
+            index = catalog.get_offer_index()
+        self.assertEqual(list(index), [self.veg.id])
+        self.assertEqual(index[self.veg.id]['discounted_price'], Decimal('50.00'))
+
+
+class CatalogApiTests(CloudKitchenTestCase):
+    def test_unchanged_page_is_answered_with_304(self):
+        url = reverse('api_items')
+        response = self.client.get(url, {'fields': 'id,name,price'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['name'] for item in response.json()['results']], ['Veg Biryani', 'Chicken Biryani'])
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):  # The catalog version, from the shared cache
+            response = self.client.get(url, {'fields': 'id,name,price'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        # Another field selection is another representation
+        response = self.client.get(url, {'fields': 'id,name'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.veg.price = Decimal('120.00')
+            self.veg.save()
+        response = self.client.get(url, {'fields': 'id,name,price'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(reverse('api_items'), {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_bad_cursor_and_limit_get_their_own_message(self):
+        response = self.client.get(reverse('api_items'), {'cursor': '-1'})
+        self.assertEqual((response.status_code, response.json()['message']), (400, 'cursor must be >= 0'))
+        response = self.client.get(reverse('api_items'), {'limit': '0'})
+        self.assertEqual((response.status_code, response.json()['message']), (400, 'limit must be between 1 and 200'))
+
+
+class KitchenQueueTests(CloudKitchenTestCase):
+    def setUp(self):
+        super().setUp()
+        kitchen._queue = None
+        self.addCleanup(setattr, kitchen, '_queue', None)
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+
+    def poll(self, etag=None):
+        headers = {'HTTP_IF_NONE_MATCH': etag} if etag else {}
+        with mock.patch('cloud_kitchen.views.time.time', return_value=1_800_000_000):
+            return self.client.get(reverse('kitchen_queue'), **headers)
+
+    def test_polls_get_304_until_the_queue_changes(self):
+        pending = self.create_order('pending')
+        response = self.poll()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([entry['id'] for entry in response.json()['orders']], [pending.id])
+        etag = response['ETag']
+        self.assertEqual(self.poll(etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            transition_order(pending, 'preparing')
+        response = self.poll(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['orders'][0]['status'], 'preparing')
+
+        # Ready orders have left the kitchen
+        with self.captureOnCommitCallbacks(execute=True):
+            transition_order(pending, 'ready')
+        response = self.poll(response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['orders'], [])
+
+    def test_customers_are_turned_away(self):
+        User.objects.filter(pk=self.user.pk).update(is_staff=False)
+        response = self.client.get(reverse('kitchen_queue'))
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(response.has_header('ETag'))
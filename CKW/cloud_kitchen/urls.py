@@ -7,17 +7,22 @@ urlpatterns = [
     path('home/', views.home_view, name='home'),
     path('menu/', views.menu_view, name='menu'),
     path('offers/', views.offers_view, name='offers'),
-    path('starters/', views.starters_view, name='starters'),
-    path('main-course/', views.main_course_view, name='main_course'),
-    path('biryani/', views.biryani_view, name='biryani'),
-    path('burgers/', views.burgers_view, name='burgers'),
-    path('desserts/', views.desserts_view, name='desserts'),
-    path('combos/', views.combos_view, name='combos'),
-    path('drinks/', views.drinks_view, name='drinks'),
+    path('search/', views.search_view, name='search'),
+    path('api/catalog/categories/', views.catalog_api_view, {'resource': 'categories'}, name='api_categories'),
+    path('api/catalog/items/', views.catalog_api_view, {'resource': 'items'}, name='api_items'),
+    path('api/catalog/offers/', views.catalog_api_view, {'resource': 'offers'}, name='api_offers'),
+    path('starters/', views.category_view, {'slug': 'starters'}, name='starters'),
+    path('main-course/', views.category_view, {'slug': 'main_course'}, name='main_course'),
+    path('biryani/', views.category_view, {'slug': 'biryani'}, name='biryani'),
+    path('burgers/', views.category_view, {'slug': 'burgers'}, name='burgers'),
+    path('desserts/', views.category_view, {'slug': 'desserts'}, name='desserts'),
+    path('combos/', views.category_view, {'slug': 'combos'}, name='combos'),
+    path('drinks/', views.category_view, {'slug': 'drinks'}, name='drinks'),
     path('cart/', views.cart_view, name='cart'),
     path('add-to-cart/<int:item_id>/', views.add_to_cart, name='add_to_cart'),
     path('update-cart-item/<int:item_id>/', views.update_cart_item, name='update_cart_item'),
     path('remove-from-cart/<int:item_id>/', views.remove_from_cart, name='remove_from_cart'),
+    path('update-cart-batch/', views.update_cart_batch, name='update_cart_batch'),
     path('forgot-password/', views.forgot_password_view, name='forgot_password'),
     path('password_reset_confirm/<uidb64>/<token>/', views.password_reset_confirm_view, name='password_reset_confirm'),
     path('profile/', views.profile_view, name='profile'),
@@ -29,4 +34,8 @@ urlpatterns = [
     path('submit-review/', views.submit_review, name='submit_review'),
     path('get-reviews/', views.get_reviews, name='get_reviews'),
     path('track/', views.track_view, name='track'),
+    path('track/orders/', views.track_orders_view, name='track_orders'),
+    path('track/events/', views.order_events_view, name='order_events'),
+    path('kitchen/', views.kitchen_view, name='kitchen'),
+    path('kitchen/queue/', views.kitchen_queue_view, name='kitchen_queue'),
 ]
@@ -8,17 +8,38 @@ from django.template.loader import render_to_string
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
 from django.contrib.auth.tokens import default_token_generator
-from .models import User, Category, FoodItem, Cart, CartItem, Order, Offer, ContactMessage, Review
+from .models import User, FoodItem, Cart, CartItem, Order, ContactMessage, Review, ReviewStats
 import random
 import string
 from django.shortcuts import render, redirect
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.contrib import messages
 from django.views.decorators.csrf import csrf_exempt
-from .models import User, Category, FoodItem, Cart, CartItem, Order, Offer, ContactMessage, Review
+from django.core.handlers.asgi import ASGIRequest
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET
+from .checkout import place_order
+from .events import order_event_stream
+from .search import search_menu
+from .kitchen import get_kitchen_queue, get_sla_minutes
+from .eta import attach_etas
+from .review_feed import get_since_cursor, review_feed_etag, review_feed_last_modified
+from .catalog import (
+    get_active_offers, get_api_page_key, get_catalog_version, get_category_menu, get_offer_index,
+    parse_api_query, render_api_page,
+)
+from .middleware import get_session_user
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from datetime import datetime
+import json
+import time
 import random
 import string
 
+ORDER_PAGE_SIZE = 10
+
 def login_view(request):
     if request.method == 'POST':
         username_or_email = request.POST.get('username')
@@ -73,7 +94,10 @@ def home_view(request):
     username = request.session.get('username')
     if not username:
         return redirect('login')
-    return render(request, 'home.html', {'username': username})
+    return render(request, 'home.html', {
+        'username': username,
+        'review_stats': ReviewStats.get_current()
+    })
 
 def forgot_password_view(request):
     if request.method == 'POST':
@@ -226,143 +250,66 @@ def menu_view(request):
         return redirect('login')
     return render(request, 'menu.html', {'username': username})
 
-def drinks_view(request):
-    username = request.session.get('username')
-    if not username:
-        return redirect('login')
-
-    # Get food items from database
+def search_view(request):
+    """API endpoint to search the menu by item name, description and category"""
+    query = request.GET.get('q', '').strip()[:100]
     try:
-        category = Category.objects.get(slug='drinks')
-        food_items = FoodItem.objects.filter(category=category, is_available=True)
-    except Category.DoesNotExist:
-        food_items = []
-
-    return render(request, 'drinks.html', {
-        'username': username,
-        'food_items': food_items
+        limit = min(max(int(request.GET.get('limit', 20)), 1), 50)
+    except ValueError:
+        limit = 20
+
+    return JsonResponse({
+        'success': True,
+        'query': query,
+        'results': search_menu(query, limit) if query else []
     })
 
-def starters_view(request):
-    username = request.session.get('username')
-    if not username:
-        return redirect('login')
-
-    # Get food items from database
+def catalog_api_etag(request, resource):
     try:
-        category = Category.objects.get(slug='starters')
-        food_items = FoodItem.objects.filter(category=category, is_available=True)
-    except Category.DoesNotExist:
-        food_items = []
-
-    return render(request, 'starters.html', {
-        'username': username,
-        'food_items': food_items
-    })
-
-def main_course_view(request):
-    username = request.session.get('username')
-    if not username:
-        return redirect('login')
-
-    # Get food items from database
+        query = parse_api_query(resource, request.GET)
+    except ValueError:
+        return None
+    return f'catalog-{get_catalog_version()}-{get_api_page_key(resource, query)}'
+
+@require_GET
+@cache_control(public=True, no_cache=True)
+@condition(etag_func=catalog_api_etag)
+def catalog_api_view(request, resource):
+    """Read-only JSON catalog API; ``resource`` is categories, items or offers
+
+    Query parameters: ``fields`` (comma-separated), ``category`` (slug),
+    ``cursor`` (from ``next_cursor``) and ``limit``.
+    """
     try:
-        category = Category.objects.get(slug='main_course')
-        food_items = FoodItem.objects.filter(category=category, is_available=True)
-    except Category.DoesNotExist:
-        food_items = []
+        query = parse_api_query(resource, request.GET)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+    return HttpResponse(render_api_page(resource, query), content_type='application/json')
 
-    return render(request, 'main_course.html', {
-        'username': username,
-        'food_items': food_items
-    })
-
-def biryani_view(request):
+def category_view(request, slug):
+    """Menu page for one category; ``slug`` is fixed per route and names the template."""
     username = request.session.get('username')
     if not username:
         return redirect('login')
 
-    # Get food items from database
-    try:
-        category = Category.objects.get(slug='biryani')
-        food_items = FoodItem.objects.filter(category=category, is_available=True)
-    except Category.DoesNotExist:
-        food_items = []
+    # Food items come from the cached catalog snapshot, not the database
+    menu = get_category_menu(slug)
 
-    return render(request, 'biryani.html', {
+    return render(request, f'{slug}.html', {
         'username': username,
-        'food_items': food_items
-    })
-
-def burgers_view(request):
-    username = request.session.get('username')
-    if not username:
-        return redirect('login')
-
-    # Get food items from database
-    try:
-        category = Category.objects.get(slug='burgers')
-        food_items = FoodItem.objects.filter(category=category, is_available=True)
-    except Category.DoesNotExist:
-        food_items = []
-
-    return render(request, 'burgers.html', {
-        'username': username,
-        'food_items': food_items
-    })
-
-def desserts_view(request):
-    username = request.session.get('username')
-    if not username:
-        return redirect('login')
-
-    # Get food items from database
-    try:
-        category = Category.objects.get(slug='desserts')
-        food_items = FoodItem.objects.filter(category=category, is_available=True)
-    except Category.DoesNotExist:
-        food_items = []
-
-    return render(request, 'desserts.html', {
-        'username': username,
-        'food_items': food_items
-    })
-
-def combos_view(request):
-    username = request.session.get('username')
-    if not username:
-        return redirect('login')
-
-    # Get food items from database
-    try:
-        category = Category.objects.get(slug='combos')
-        food_items = FoodItem.objects.filter(category=category, is_available=True)
-    except Category.DoesNotExist:
-        food_items = []
-
-    return render(request, 'combos.html', {
-        'username': username,
-        'food_items': food_items
+        'food_items': menu['food_items'],
+        'catalog_version': get_catalog_version()
     })
 
 def get_or_create_cart(request):
     """Get or create cart for the current user/session"""
-    user_id = request.session.get('user_id')
+    user = get_session_user(request)
 
-    if user_id:
+    if user:
         # User is logged in with custom authentication
-        try:
-            user = User.objects.get(id=user_id)
-            cart, created = Cart.objects.get_or_create(user=user)
-        except User.DoesNotExist:
-            # Fallback to session-based cart if user not found
-            session_key = request.session.session_key
-            if not session_key:
-                request.session.create()
-                session_key = request.session.session_key
-            cart, created = Cart.objects.get_or_create(session_key=session_key)
+        cart, created = Cart.objects.get_or_create(user=user)
     else:
-        # For anonymous users, use session key
+        # For anonymous users (or a session whose user no longer exists), use session key
         session_key = request.session.session_key
         if not session_key:
             request.session.create()
@@ -376,11 +323,13 @@ def cart_view(request):
         return redirect('login')
 
     cart = get_or_create_cart(request)
+    items = list(cart.cartitem_set.select_related('food_item'))
     cart_items = []
 
-    for item in cart.cartitem_set.all():
+    for item in items:
         cart_items.append({
             'id': item.id,
+            'food_item_id': item.food_item_id,
             'name': item.food_item.name,
             'description': item.food_item.description,
             'price': item.food_item.price,
@@ -390,18 +339,15 @@ def cart_view(request):
         })
 
     # Calculate totals
-    subtotal = cart.get_subtotal()
-    delivery_fee = cart.get_delivery_fee()
-    tax = cart.get_tax()
-    total = cart.get_total()
+    totals = cart.get_totals(items)
 
     context = {
         'username': username,
         'cart_items': cart_items,
-        'subtotal': subtotal,
-        'delivery_fee': delivery_fee,
-        'tax': tax,
-        'total': total
+        'subtotal': totals['subtotal'],
+        'delivery_fee': totals['delivery_fee'],
+        'tax': totals['tax'],
+        'total': totals['total']
     }
 
     return render(request, 'cart.html', context)
@@ -413,37 +359,16 @@ def add_to_cart(request, item_id):
             food_item = FoodItem.objects.get(id=item_id, is_available=True)
             cart = get_or_create_cart(request)
 
-            # Check if this is being added from offers page (check for offer parameter)
-            is_offer_item = request.POST.get('is_offer', 'false').lower() == 'true'
-
-            # Get offer price if it's an offer item
-            offer_price = None
-            if is_offer_item:
-                try:
-                    offer = Offer.objects.get(food_item=food_item, is_active=True)
-                    offer_price = offer.get_discounted_price()
-                except Offer.DoesNotExist:
-                    offer_price = None
-
-            cart_item, created = CartItem.objects.get_or_create(
-                cart=cart,
-                food_item=food_item,
-                defaults={
-                    'quantity': 1,
-                    'is_offer_item': is_offer_item,
-                    'offer_price': offer_price
-                }
-            )
+            # The best active offer for the item applies wherever it is added
+            # from, so the cart charges the price the menu pages show
+            offer = get_offer_index().get(food_item.id)
+            is_offer_item = offer is not None
+            offer_price = offer['discounted_price'] if offer else None
 
-            if not created:
-                cart_item.quantity += 1
-                # Update offer status if adding to existing item
-                if is_offer_item and not cart_item.is_offer_item:
-                    cart_item.is_offer_item = True
-                    cart_item.offer_price = offer_price
-                cart_item.save()
+            # Atomic increment-or-insert; safe against concurrent double-clicks
+            cart.add_item(food_item, is_offer_item=is_offer_item, offer_price=offer_price)
 
-            return JsonResponse({'success': True, 'message': 'Item added to cart'})
+            return JsonResponse({'success': True, 'message': 'Item added to cart', 'cart_count': cart.item_count})
         except FoodItem.DoesNotExist:
             return JsonResponse({'success': False, 'message': 'Item not found'})
         except Exception as e:
@@ -457,23 +382,33 @@ def update_cart_item(request, item_id):
         try:
             action = request.POST.get('action')
             cart = get_or_create_cart(request)
-            cart_item = CartItem.objects.get(id=item_id, cart=cart)
+            # The line stays locked until its change and the summary delta are both written
+            with transaction.atomic():
+                cart_item = CartItem.objects.select_for_update(of=('self',)).select_related('food_item').get(
+                    id=item_id, cart=cart
+                )
+                previous_quantity = cart_item.quantity
+                previous_total = cart_item.get_total_price()
 
-            if action == 'increase':
-                cart_item.quantity += 1
-            elif action == 'decrease' and cart_item.quantity > 1:
-                cart_item.quantity -= 1
+                if action == 'increase':
+                    cart_item.quantity += 1
+                elif action == 'decrease' and cart_item.quantity > 1:
+                    cart_item.quantity -= 1
 
-            cart_item.save()
+                if cart_item.quantity != previous_quantity:
+                    cart_item.save(update_fields=['quantity'])
+                    cart.adjust_summary(cart_item.quantity - previous_quantity, cart_item.get_total_price() - previous_total)
 
             # Return updated totals
+            totals = cart.get_summary()
             return JsonResponse({
                 'success': True,
                 'quantity': cart_item.quantity,
                 'item_total': float(cart_item.get_total_price()),
-                'subtotal': float(cart.get_subtotal()),
-                'tax': float(cart.get_tax()),
-                'total': float(cart.get_total())
+                'cart_count': totals['item_count'],
+                'subtotal': float(totals['subtotal']),
+                'tax': float(totals['tax']),
+                'total': float(totals['total'])
             })
 
         except CartItem.DoesNotExist:
@@ -488,14 +423,23 @@ def remove_from_cart(request, item_id):
     if request.method == 'POST':
         try:
             cart = get_or_create_cart(request)
-            cart_item = CartItem.objects.get(id=item_id, cart=cart)
-            cart_item.delete()
+            with transaction.atomic():
+                cart_item = CartItem.objects.select_for_update(of=('self',)).select_related('food_item').get(
+                    id=item_id, cart=cart
+                )
+                line_total = cart_item.get_total_price()
+                # Only the request that actually deletes the line takes it out of the summary
+                deleted, _ = CartItem.objects.filter(pk=cart_item.pk, cart=cart).delete()
+                if deleted:
+                    cart.adjust_summary(-cart_item.quantity, -line_total)
 
+            totals = cart.get_summary()
             return JsonResponse({
                 'success': True,
-                'subtotal': float(cart.get_subtotal()),
-                'tax': float(cart.get_tax()),
-                'total': float(cart.get_total())
+                'cart_count': totals['item_count'],
+                'subtotal': float(totals['subtotal']),
+                'tax': float(totals['tax']),
+                'total': float(totals['total'])
             })
 
         except CartItem.DoesNotExist:
@@ -505,11 +449,52 @@ def remove_from_cart(request, item_id):
 
     return JsonResponse({'success': False, 'message': 'Invalid request method'})
 
+MAX_CART_BATCH_OPERATIONS = 100
+
+def update_cart_batch(request):
+    """AJAX endpoint applying several cart changes in one request
+
+    Expects a JSON body like {"operations": [{"food_item_id": 3, "delta": 1},
+    {"food_item_id": 5, "set_quantity": 2}, {"food_item_id": 7, "remove": true}]}
+    and returns the touched lines plus the new cart totals.
+    """
+    if request.method == 'POST':
+        try:
+            payload = json.loads(request.body or b'{}')
+            operations = payload.get('operations')
+            if not isinstance(operations, list) or not operations:
+                return JsonResponse({'success': False, 'message': 'No operations given'})
+            if len(operations) > MAX_CART_BATCH_OPERATIONS:
+                return JsonResponse({'success': False, 'message': 'Too many operations in one batch'})
+
+            cart = get_or_create_cart(request)
+            lines = cart.apply_operations(operations)
+
+            totals = cart.get_summary()
+            return JsonResponse({
+                'success': True,
+                'items': {
+                    str(food_item_id): {
+                        'quantity': line.quantity,
+                        'item_total': float(line.get_total_price())
+                    } if line else None
+                    for food_item_id, line in lines.items()
+                },
+                'cart_count': totals['item_count'],
+                'subtotal': float(totals['subtotal']),
+                'tax': float(totals['tax']),
+                'total': float(totals['total'])
+            })
+
+        except Exception as e:
+            return JsonResponse({'success': False, 'message': str(e)})
+
+    return JsonResponse({'success': False, 'message': 'Invalid request method'})
+
 def profile_view(request):
-    user_id = request.session.get('user_id')
-    if not user_id:
+    user = get_session_user(request)
+    if not user:
         return redirect('login')
-    user = User.objects.get(id=user_id)
     if request.method == 'POST':
         # Handle profile picture upload
         if 'profile_pic' in request.FILES:
@@ -542,18 +527,141 @@ def track_view(request):
     if not username:
         return redirect('login')
 
-    user_id = request.session.get('user_id')
-    user = User.objects.get(id=user_id)
+    user = get_session_user(request)
+    if not user:
+        return redirect('login')
 
-    # Get user's orders, latest first
-    orders = Order.objects.filter(user=user).order_by('-created_at')
+    orders, next_cursor = get_order_page(user)
 
     context = {
         'username': username,
-        'orders': orders
+        'orders': orders,
+        'next_cursor': next_cursor
     }
 
     return render(request, 'track.html', context)
+
+def track_orders_view(request):
+    """Next page of the order history for infinite scroll on the track page"""
+    user = get_session_user(request)
+    if not user:
+        return JsonResponse({'success': False, 'message': 'Please log in'}, status=401)
+
+    try:
+        orders, next_cursor = get_order_page(user, request.GET.get('cursor'))
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Invalid cursor'}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'orders': [{
+            'id': order.id,
+            'order_number': order.order_number,
+            'status': order.status,
+            'status_display': order.get_status_display(),
+            'total': str(order.total),
+            'created_at': order.created_at.isoformat(),
+            'eta': order.eta['earliest'].isoformat() if order.eta else None,
+        } for order in orders],
+        'html': render_to_string('track_order_cards.html', {'orders': orders}, request=request),
+        'next_cursor': next_cursor
+    })
+
+async def order_events_view(request):
+    """Server-Sent Events stream of status changes to the logged-in user's orders"""
+    if not isinstance(request, ASGIRequest):
+        # Under WSGI every open stream would hold a worker thread. 204 tells
+        # EventSource not to reconnect, leaving the page as it was.
+        return HttpResponse(status=204)
+
+    user_id = await request.session.aget('user_id')
+    if not user_id:
+        return HttpResponse(status=204)
+
+    response = StreamingHttpResponse(order_event_stream(user_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering the stream
+    return response
+
+def is_kitchen_staff(request):
+    """Staff accounts of the site, or users logged in to the Django admin"""
+    user = get_session_user(request)
+    if user and user.is_staff:
+        return True
+    return request.user.is_authenticated and request.user.is_staff
+
+def kitchen_view(request):
+    if not is_kitchen_staff(request):
+        return redirect('login')
+    return render(request, 'kitchen.html', {'sla_minutes': get_sla_minutes()})
+
+def kitchen_queue_etag(request):
+    if not is_kitchen_staff(request):
+        return None
+    queue = get_kitchen_queue()
+    # The minute keeps the wait-time stats from going stale behind 304s
+    return f'kds-{queue.token}-{queue.version}-{int(time.time() // 60)}'
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=kitchen_queue_etag)
+def kitchen_queue_view(request):
+    """API endpoint for kitchen screens: open orders, most urgent first, with queue stats
+
+    Served from the in-memory kitchen queue; polls within the same minute
+    get a 304 unless the queue changed.
+    """
+    if not is_kitchen_staff(request):
+        return JsonResponse({'success': False, 'message': 'Staff only'}, status=403)
+
+    queue = get_kitchen_queue()
+    now = timezone.now()
+    return JsonResponse({
+        'success': True,
+        'version': queue.version,
+        'generated_at': now.isoformat(),
+        'stats': queue.stats(now),
+        'orders': [{
+            'id': entry['id'],
+            'order_number': entry['order_number'],
+            'status': entry['status'],
+            'created_at': entry['created_at'].isoformat(),
+            'start_by': entry['start_by'].isoformat(),
+            'deadline': entry['deadline'].isoformat(),
+            'prep_minutes': entry['prep_minutes'],
+            'items': entry['items'],
+        } for entry in queue.ordered()]
+    })
+
+def get_order_page(user, cursor=None):
+    """Return one page of ``user``'s orders, latest first, and the cursor for the next page.
+
+    Pages are keyed on (created_at, id) so each one is a range read on the
+    (user, -created_at, -id) index no matter how deep the history goes.
+    Raises ValueError for a malformed cursor.
+    """
+    orders = Order.objects.filter(user=user).only(
+        'id', 'order_number', 'status', 'total', 'created_at'
+    ).order_by('-created_at', '-id')
+
+    if cursor:
+        try:
+            created_at, order_id = force_str(urlsafe_base64_decode(cursor)).rsplit('|', 1)
+            created_at = datetime.fromisoformat(created_at)
+            order_id = int(order_id)
+        except (TypeError, ValueError, UnicodeDecodeError):
+            raise ValueError('Invalid cursor')
+        orders = orders.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=order_id)
+        )
+
+    page = list(orders[:ORDER_PAGE_SIZE + 1])
+    next_cursor = None
+    if len(page) > ORDER_PAGE_SIZE:
+        page = page[:ORDER_PAGE_SIZE]
+        last = page[-1]
+        next_cursor = urlsafe_base64_encode(force_bytes(f'{last.created_at.isoformat()}|{last.id}'))
+    attach_etas(page)
+    return page, next_cursor
 def contact_view(request):
     username = request.session.get('username')
     if not username:
@@ -566,13 +674,7 @@ def contact_view(request):
         message = request.POST.get('message')
 
         # Get current user if logged in
-        user_id = request.session.get('user_id')
-        user = None
-        if user_id:
-            try:
-                user = User.objects.get(id=user_id)
-            except User.DoesNotExist:
-                user = None
+        user = get_session_user(request)
 
         # Save contact message
         ContactMessage.objects.create(
@@ -594,11 +696,13 @@ def reviews_view(request):
         return redirect('login')
 
     # Get latest 4 reviews for display
-    latest_reviews = Review.objects.select_related('user').order_by('-created_at')[:4]
+    latest_reviews = list(Review.objects.select_related('user').order_by('-id')[:4])
 
     context = {
         'username': username,
-        'latest_reviews': latest_reviews
+        'latest_reviews': latest_reviews,
+        'review_cursor': latest_reviews[0].id if latest_reviews else 0,
+        'review_stats': ReviewStats.get_current()
     }
     return render(request, 'reviews.html', context)
 
@@ -609,8 +713,11 @@ def submit_review(request):
         if not user_id:
             return JsonResponse({'success': False, 'message': 'User not logged in'})
 
+        user = get_session_user(request)
+        if not user:
+            return JsonResponse({'success': False, 'message': 'User not found'})
+
         try:
-            user = User.objects.get(id=user_id)
             message = request.POST.get('message', '').strip()
             stars = request.POST.get('stars')
 
@@ -620,12 +727,13 @@ def submit_review(request):
             if not stars or not stars.isdigit() or not (1 <= int(stars) <= 5):
                 return JsonResponse({'success': False, 'message': 'Please select a valid rating (1-5 stars)'})
 
-            # Create the review
-            review = Review.objects.create(
-                user=user,
-                message=message,
-                stars=int(stars)
-            )
+            # Create the review; the rating summary is updated in the same transaction
+            with transaction.atomic():
+                review = Review.objects.create(
+                    user=user,
+                    message=message,
+                    stars=int(stars)
+                )
 
             return JsonResponse({
                 'success': True,
@@ -640,17 +748,24 @@ def submit_review(request):
                 }
             })
 
-        except User.DoesNotExist:
-            return JsonResponse({'success': False, 'message': 'User not found'})
         except Exception as e:
             return JsonResponse({'success': False, 'message': str(e)})
 
     return JsonResponse({'success': False, 'message': 'Invalid request method'})
 
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=review_feed_etag, last_modified_func=review_feed_last_modified)
 def get_reviews(request):
-    """API endpoint to get latest 4 reviews"""
+    """API endpoint to get the latest 4 reviews, or only those newer than ``since``
+
+    Unchanged polls are answered with 304 before this view runs.
+    """
     try:
-        reviews = Review.objects.select_related('user').order_by('-created_at')[:4]
+        reviews = Review.objects.select_related('user').order_by('-id')
+        since = get_since_cursor(request)
+        if since:
+            reviews = reviews.filter(id__gt=since)
+        reviews = reviews[:4]
         reviews_data = []
 
         for review in reviews:
@@ -663,7 +778,12 @@ def get_reviews(request):
                 'created_at': review.created_at.strftime('%Y-%m-%d %H:%M:%S')
             })
 
-        return JsonResponse({'success': True, 'reviews': reviews_data})
+        return JsonResponse({
+            'success': True,
+            'reviews': reviews_data,
+            # Pass back as ``since`` on the next poll
+            'cursor': reviews_data[0]['id'] if reviews_data else since
+        })
 
     except Exception as e:
         return JsonResponse({'success': False, 'message': str(e)})
@@ -681,26 +801,11 @@ def offers_view(request):
     if not username:
         return redirect('login')
 
-    # Get all active offers with food items
-    offers = Offer.objects.filter(is_active=True).select_related('food_item')
-
-    offer_items = []
-    for offer in offers:
-        offer_items.append({
-            'id': offer.id,
-            'food_item_id': offer.food_item.id,
-            'name': offer.food_item.name,
-            'description': offer.food_item.description,
-            'original_price': offer.food_item.price,
-            'discounted_price': offer.get_discounted_price(),
-            'discount_percentage': offer.discount_percentage,
-            'icon_class': offer.food_item.icon_class,
-            'is_available': offer.food_item.is_available
-        })
-
+    # Active offers come from the cached catalog snapshot
     context = {
         'username': username,
-        'offer_items': offer_items
+        'offer_items': get_active_offers(),
+        'catalog_version': get_catalog_version()
     }
 
     return render(request, 'offers.html', context)
@@ -710,49 +815,19 @@ def order_confirmation_view(request):
     if not username:
         return redirect('login')
 
-    user_id = request.session.get('user_id')
-    user = User.objects.get(id=user_id)
-    cart = get_or_create_cart(request)
-
-    # Check if cart has items
-    if not cart.cartitem_set.exists():
-        return redirect('cart')
+    user = get_session_user(request)
+    if not user:
+        return redirect('login')
 
     # Check if this is a POST request (from cart pay button)
     if request.method == 'POST':
-        # Prepare order items data
-        order_items = []
-        for item in cart.cartitem_set.all():
-            order_items.append({
-                'food_item_id': item.food_item.id,
-                'name': item.food_item.name,
-                'description': item.food_item.description,
-                'price': float(item.food_item.price),
-                'quantity': item.quantity,
-                'total_price': float(item.get_total_price()),
-                'is_offer_item': item.is_offer_item,
-                'offer_price': float(item.offer_price) if item.offer_price else None
-            })
-
-        # Calculate totals
-        subtotal = cart.get_subtotal()
-        delivery_fee = cart.get_delivery_fee()
-        tax = cart.get_tax()
-        total = cart.get_total()
-
-        # Create the order
-        order = Order.objects.create(
-            user=user,
-            items=order_items,  # Store as JSON
-            subtotal=subtotal,
-            delivery_fee=delivery_fee,
-            tax=tax,
-            total=total,
-            status='pending'
-        )
-
-        # Clear the cart after successful order creation
-        cart.cartitem_set.all().delete()
+        client_token = request.POST.get('checkout_token')
+        if client_token and len(client_token) > Order._meta.get_field('client_token').max_length:
+            return JsonResponse({'success': False, 'message': 'Invalid checkout token'}, status=400)
+        cart = get_or_create_cart(request)
+        order, created = place_order(user, cart, client_token=client_token)
+        if order is None:
+            return JsonResponse({'success': False, 'message': 'Your cart is empty'})
 
         # Store order details in session for GET request
         request.session['last_order_id'] = order.id